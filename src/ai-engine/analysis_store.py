@@ -0,0 +1,282 @@
+"""
+Manifest Engine v1.3 - Analysis Store
+Every processed video's scenes, transcript segments and per-second features in SQLite, indexed for queries.
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from sqlite_connection import ForkSafeConnection
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the database file SQLite reads through mmap instead of read() calls
+STORE_MMAP_MB = int(os.environ.get("MANIFEST_ANALYSIS_MMAP_MB", 256))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    content_hash TEXT,
+    filename TEXT,
+    duration REAL,
+    transcript TEXT,
+    keywords TEXT,
+    viral_score REAL,
+    titles TEXT,
+    hashtags TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS scenes (
+    video_id TEXT,
+    scene INTEGER,
+    start REAL,
+    "end" REAL,
+    PRIMARY KEY (video_id, scene)
+);
+CREATE INDEX IF NOT EXISTS scenes_range ON scenes (video_id, start, "end");
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT,
+    segment INTEGER,
+    start REAL,
+    "end" REAL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS segments_range ON segments (video_id, start, "end");
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_text USING fts5 (text, content='segments', content_rowid='id');
+CREATE TABLE IF NOT EXISTS features (
+    video_id TEXT,
+    name TEXT,
+    data BLOB,
+    PRIMARY KEY (video_id, name)
+);
+"""
+
+
+def match_query(terms: str) -> str:
+    """FTS5 query matching every word, quoted so user input can't inject query syntax"""
+    words = [word.replace('"', '') for word in terms.split()]
+    return " ".join(f'"{word}"' for word in words if word)
+
+
+class AnalysisStore:
+    """SQLite store of finished analyses, one row set per video ID
+
+    Per-second features are stored as float32 blobs and sliced in numpy.
+    Transcript segments carry an FTS5 index for keyword lookups, and
+    scenes and segments a (video, start, end) index for time ranges.
+    """
+
+    def __init__(self, db_path: Path, mmap_mb: int = STORE_MMAP_MB):
+        self.db_path = Path(db_path)
+        self.mmap_mb = mmap_mb
+        # Nothing is opened until first use, and again in a forked child
+        self._db = ForkSafeConnection(self._connect)
+
+    @property
+    def _lock(self) -> threading.Lock:
+        return self._db.lock
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The current process's connection, only touched under _lock"""
+        return self._db.conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_mb * 1024 * 1024}")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def put(self, video_id: str, content_hash: str, filename: str, results: Dict[str, Any],
+            features: Optional[Dict[str, Iterable[float]]] = None) -> None:
+        """Replace everything stored for video_id with this analysis
+
+        Without features, those already stored for the same content are reused,
+        e.g. when a cached or shared result is indexed under a new video ID.
+        """
+        segments = [
+            (video_id, i, float(segment.get("start") or 0), float(segment.get("end") or 0), segment.get("text", ""))
+            for i, segment in enumerate(results.get("transcript_segments", []))
+        ]
+        scenes = [
+            (video_id, i, float(scene["start"]), float(scene["end"]))
+            for i, scene in enumerate(results.get("scenes", []))
+        ]
+        arrays = [
+            (video_id, name, np.asarray(values, dtype=np.float32).tobytes())
+            for name, values in (features or {}).items() if values is not None
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete(video_id)
+                self._conn.execute(
+                    "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, content_hash, filename, results.get("duration", 0), results.get("transcript"),
+                     json.dumps(results.get("keywords", [])), results.get("viral_score", 0.0),
+                     json.dumps(results.get("suggested_titles", [])),
+                     json.dumps(results.get("suggested_hashtags", [])), time.time())
+                )
+                self._conn.executemany("INSERT INTO scenes VALUES (?, ?, ?, ?)", scenes)
+                self._conn.executemany(
+                    'INSERT INTO segments (video_id, segment, start, "end", text) VALUES (?, ?, ?, ?, ?)', segments
+                )
+                self._conn.execute(
+                    "INSERT INTO segments_text (rowid, text) SELECT id, text FROM segments WHERE video_id = ?",
+                    (video_id,)
+                )
+                self._conn.executemany("INSERT INTO features VALUES (?, ?, ?)", arrays)
+                if features is None:
+                    self._conn.execute(
+                        "INSERT INTO features SELECT ?, name, data FROM features WHERE video_id = "
+                        "(SELECT video_id FROM videos WHERE content_hash = ? AND video_id != ? LIMIT 1)",
+                        (video_id, content_hash, video_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _delete(self, video_id: str) -> None:
+        # The FTS index is external content, rows leave it through the 'delete' command
+        self._conn.execute(
+            "INSERT INTO segments_text (segments_text, rowid, text) "
+            "SELECT 'delete', id, text FROM segments WHERE video_id = ?", (video_id,)
+        )
+        for table in ("videos", "scenes", "segments", "features"):
+            self._conn.execute(f"DELETE FROM {table} WHERE video_id = ?", (video_id,))
+
+    def delete(self, video_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete(video_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def has(self, video_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone() is not None
+
+    def summary(self, video_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, filename, duration, transcript, keywords, viral_score, titles, hashtags, "
+                "updated_at FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = [
+                self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE video_id = ?", (video_id,)).fetchone()[0]
+                for table in ("scenes", "segments")
+            ]
+            names = [name for (name,) in self._conn.execute(
+                "SELECT name FROM features WHERE video_id = ? ORDER BY name", (video_id,)
+            )]
+        return {
+            "videoId": video_id,
+            "content_hash": row[0],
+            "filename": row[1],
+            "duration": row[2],
+            "transcript": row[3],
+            "keywords": json.loads(row[4]),
+            "viral_score": row[5],
+            "suggested_titles": json.loads(row[6]),
+            "suggested_hashtags": json.loads(row[7]),
+            "updated_at": row[8],
+            "scene_count": counts[0],
+            "segment_count": counts[1],
+            "features": names
+        }
+
+    def scenes(self, video_id: str, start: Optional[float] = None, end: Optional[float] = None,
+               text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Scenes overlapping [start, end), only those with a segment matching text if given"""
+        if text is not None and not match_query(text):
+            return []
+        query = 'SELECT scene, start, "end" FROM scenes WHERE video_id = ?'
+        params: list = [video_id]
+        if start is not None:
+            query += ' AND "end" > ?'
+            params.append(start)
+        if end is not None:
+            query += " AND start < ?"
+            params.append(end)
+        if text:
+            query += (
+                ' AND EXISTS (SELECT 1 FROM segments_text JOIN segments ON segments.id = segments_text.rowid'
+                ' WHERE segments_text MATCH ? AND segments.video_id = scenes.video_id'
+                ' AND segments.start < scenes."end" AND segments."end" > scenes.start)'
+            )
+            params.append(match_query(text))
+        query += " ORDER BY start"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {"scene": scene, "start": s, "end": e, "duration": round(e - s, 3)}
+            for scene, s, e in rows
+        ]
+
+    def segments(self, video_id: Optional[str] = None, start: Optional[float] = None,
+                 end: Optional[float] = None, text: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Transcript segments in a time range and/or matching text, across all videos if video_id is None"""
+        if text is not None and not match_query(text):
+            return []
+        conditions: List[str] = []
+        params: list = []
+        source = "segments"
+        if text:
+            source = "segments_text JOIN segments ON segments.id = segments_text.rowid"
+            conditions.append("segments_text MATCH ?")
+            params.append(match_query(text))
+        if video_id is not None:
+            conditions.append("segments.video_id = ?")
+            params.append(video_id)
+        if start is not None:
+            conditions.append('"end" > ?')
+            params.append(start)
+        if end is not None:
+            conditions.append("start < ?")
+            params.append(end)
+        query = f'SELECT segments.video_id, segment, start, "end", segments.text FROM {source}'
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY segments.video_id, start LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {"videoId": vid, "segment": segment, "start": s, "end": e, "text": t}
+            for vid, segment, s, e, t in rows
+        ]
+
+    def feature(self, video_id: str, name: str, start: Optional[float] = None,
+                end: Optional[float] = None) -> Optional[List[float]]:
+        """A per-second feature, index i covering second i, sliced to [start, end)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM features WHERE video_id = ? AND name = ?", (video_id, name)
+            ).fetchone()
+        if row is None:
+            return None
+        values = np.frombuffer(row[0], dtype=np.float32)
+        first = max(0, int(start)) if start is not None else 0
+        last = int(np.ceil(end)) if end is not None else len(values)
+        return np.round(values[first:last].astype(np.float64), 5).tolist()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        return {"videos": videos, "path": str(self.db_path)}
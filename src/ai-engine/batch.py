@@ -0,0 +1,50 @@
+"""
+Manifest Engine v1.3 - Batch Processing
+Run many videos from one request at bounded concurrency and report each as it finishes.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.environ.get("MANIFEST_BATCH_CONCURRENCY", 4))
+BATCH_MAX_VIDEOS = int(os.environ.get("MANIFEST_BATCH_MAX_VIDEOS", 1000))
+
+
+async def run_batch(items: List[Any], process: Callable[[Any], Awaitable[Any]],
+                    concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Dict[str, Any]]:
+    """Yield {"index", "status", "result"|"error"} for every item in completion order
+
+    A fixed set of runners pulls items in order, so a batch of hundreds never
+    holds more than concurrency videos in flight. Closing the iterator, e.g.
+    when the client disconnects, cancels whatever is still running.
+    """
+    pending = iter(enumerate(items))
+    outcomes: asyncio.Queue = asyncio.Queue()
+
+    async def runner() -> None:
+        for index, item in pending:
+            try:
+                outcome = {"index": index, "status": "completed", "result": await process(item)}
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e)
+                logger.error(f"Batch item {index} failed: {error}")
+                outcome = {"index": index, "status": "failed", "error": error}
+            await outcomes.put(outcome)
+
+    runners = [asyncio.create_task(runner()) for _ in range(max(1, min(concurrency, len(items))))]
+    try:
+        for _ in range(len(items)):
+            yield await outcomes.get()
+    finally:
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+
+
+def ndjson(record: Dict[str, Any]) -> str:
+    return json.dumps(record, default=str) + "\n"
@@ -0,0 +1,338 @@
+"""
+Manifest Engine v1.3 - Benchmark
+Time the processing pipeline on synthetic videos and report comparable JSON.
+
+Usage:
+    python benchmark.py --preset quick --output bench.json
+    python benchmark.py --preset full --repeat 5 --compare bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("detect_scenes", "extract_keywords", "analyze_viral_potential", "generate_clips", "process_video")
+
+# name, width, height, fps, seconds, cut pattern, seconds between cuts
+PRESETS = {
+    "quick": [
+        ("360p_hard_10s", 640, 360, 30, 10, "hard", 2.5),
+        ("720p_fade_10s", 1280, 720, 30, 10, "fade", 2.5),
+    ],
+    "full": [
+        ("360p_hard_30s", 640, 360, 30, 30, "hard", 3.0),
+        ("360p_static_30s", 640, 360, 30, 30, "static", 0),
+        ("720p_hard_60s", 1280, 720, 30, 60, "hard", 5.0),
+        ("720p_fade_60s", 1280, 720, 30, 60, "fade", 5.0),
+        ("1080p_hard_60s", 1920, 1080, 30, 60, "hard", 4.0),
+        ("1080p_rapid_30s", 1920, 1080, 60, 30, "hard", 0.5),
+    ],
+}
+
+WORDS = ("video", "creator", "amazing", "editing", "tutorial", "camera", "lighting", "story",
+         "audience", "channel", "the", "and", "with", "this", "that", "really", "workflow", "shorts")
+
+
+def make_video(path: Path, width: int, height: int, fps: int, seconds: float,
+               pattern: str = "hard", cut_every: float = 5.0, seed: int = 0) -> int:
+    """Write a synthetic clip with known scene cuts, returns the frame count
+
+    Every scene is a flat colour with a moving disc and light noise, so scene
+    detection sees motion inside scenes and a jump (or a one second cross-fade
+    for "fade") at each cut. "static" is a single scene.
+    """
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write {path}")
+
+    frames = int(seconds * fps)
+    scene_frames = int(cut_every * fps) if pattern != "static" and cut_every > 0 else frames
+    fade_frames = fps if pattern == "fade" else 0
+    colours = [rng.integers(0, 256, 3).astype(np.float32) for _ in range(frames // max(1, scene_frames) + 2)]
+    noise = rng.integers(0, 12, (height, width, 3), dtype=np.uint8)
+    radius = max(8, height // 12)
+
+    for index in range(frames):
+        scene, offset = divmod(index, scene_frames)
+        colour = colours[scene]
+        if fade_frames and scene > 0 and offset < fade_frames:
+            mix = offset / fade_frames
+            colour = colours[scene - 1] * (1 - mix) + colour * mix
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = colour.astype(np.uint8)
+        frame = cv2.add(frame, noise)
+        x = int((index * 7) % width)
+        cv2.circle(frame, (x, height // 2), radius, (255, 255, 255), -1)
+        writer.write(frame)
+
+    writer.release()
+    return frames
+
+
+def synthetic_transcript(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class PeakRSS:
+    """Highest resident set size of this process while the block runs
+
+    Sampled on a background thread with psutil; without it the process-wide
+    ru_maxrss is reported, which only ever grows across stages.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        process = psutil.Process()
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if PSUTIL_AVAILABLE:
+            self.peak = psutil.Process().memory_info().rss
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        elif resource is not None:
+            # ru_maxrss is in KiB on Linux, bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return False
+
+    @property
+    def mb(self) -> float:
+        return round(self.peak / (1024 * 1024), 1)
+
+
+async def measure(run: Callable[[], Awaitable[Any]], repeat: int,
+                  frames: Optional[int] = None) -> Tuple[Dict[str, Any], Any]:
+    """Median, min and max latency over repeat runs, plus peak RSS and frames/sec, and the last result"""
+    runs = []
+    result = None
+    with PeakRSS() as rss:
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            result = await run()
+            runs.append(time.perf_counter() - started)
+
+    median = statistics.median(runs)
+    stats = {
+        "seconds": round(median, 4),
+        "min_seconds": round(min(runs), 4),
+        "max_seconds": round(max(runs), 4),
+        "runs": len(runs),
+        "peak_rss_mb": rss.mb
+    }
+    if frames and median > 0:
+        stats["fps"] = round(frames / median, 1)
+    return stats, result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run_scenario(engine: Any, scenario: tuple, repeat: int, stages: List[str]) -> Dict[str, Any]:
+    name, width, height, fps, seconds, pattern, cut_every = scenario
+    processor = engine.processor
+    filename = f"bench_{name}.mp4"
+    video_path = processor.upload_dir / filename
+    frames = make_video(video_path, width, height, fps, seconds, pattern, cut_every)
+    transcript = synthetic_transcript(int(seconds * 2.5))
+    settings = {"transcribe": False, "generateClips": True, "numClips": 3, "clipDuration": 5}
+    report = {
+        "name": name, "width": width, "height": height, "fps": fps, "seconds": seconds,
+        "pattern": pattern, "cut_every": cut_every, "frames": frames, "stages": {}
+    }
+    logger.info(f"Benchmarking {name} ({frames} frames)")
+
+    scenes = []
+    if "detect_scenes" in stages or "generate_clips" in stages:
+        report["stages"]["detect_scenes"], scenes = await measure(
+            lambda: processor.detect_scenes(video_path, settings=settings), repeat, frames
+        )
+        report["scenes_detected"] = len(scenes)
+
+    if "extract_keywords" in stages:
+        async def keywords():
+            return processor.extract_keywords(transcript)
+        report["stages"]["extract_keywords"], _ = await measure(keywords, repeat)
+
+    if "analyze_viral_potential" in stages:
+        report["stages"]["analyze_viral_potential"], _ = await measure(
+            lambda: processor.analyze_viral_potential(video_path, transcript), repeat
+        )
+
+    if "generate_clips" in stages and (engine.FFMPEG_AVAILABLE or engine.MOVIEPY_AVAILABLE):
+        async def clips():
+            rendered = await processor.generate_clips(video_path, scenes, settings)
+            remove_outputs(processor, rendered)
+            return rendered
+        report["stages"]["generate_clips"], _ = await measure(clips, repeat)
+
+    if "process_video" in stages:
+        async def full():
+            analysis = await processor.process_video(name, filename, settings)
+            remove_outputs(processor, analysis.clips)
+            return analysis
+        report["stages"]["process_video"], analysis = await measure(full, repeat, frames)
+        report["process_timings"] = analysis.timings
+
+    video_path.unlink(missing_ok=True)
+    return report
+
+
+def remove_outputs(processor: Any, clips: List[Dict[str, Any]]) -> None:
+    for clip in clips:
+        (processor.clips_dir / clip["filename"]).unlink(missing_ok=True)
+        for rendition in clip.get("renditions", []):
+            (processor.clips_dir / rendition["filename"]).unlink(missing_ok=True)
+        for key in ("thumbnail", "thumbnail_preview"):
+            if clip.get(key):
+                (processor.processed_dir / clip[key]).unlink(missing_ok=True)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per scenario stage: baseline vs current median and the ratio"""
+    previous = {scenario["name"]: scenario["stages"] for scenario in baseline.get("scenarios", [])}
+    lines = []
+    for scenario in current["scenarios"]:
+        for stage, stats in scenario["stages"].items():
+            before = previous.get(scenario["name"], {}).get(stage)
+            if not before or not before["seconds"]:
+                continue
+            ratio = stats["seconds"] / before["seconds"]
+            lines.append(
+                f"{scenario['name']:<20} {stage:<24} {before['seconds']:>9.4f}s -> "
+                f"{stats['seconds']:>9.4f}s  x{ratio:.2f}"
+            )
+    return lines
+
+
+async def run_benchmark(args: argparse.Namespace, data_dir: Path) -> Dict[str, Any]:
+    # Everything the engine writes goes under the scratch directory, and nothing is cached between runs
+    os.environ["MANIFEST_DATA_DIR"] = str(data_dir)
+    os.environ["MANIFEST_CACHE_MEMORY_ENTRIES"] = "0"
+    os.environ["MANIFEST_CACHE_DISK_MB"] = "0"
+    sys.path.insert(0, str(Path(__file__).parent))
+    import main as engine
+    engine.processor.cache.redis = None
+
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    scenarios = []
+    try:
+        for scenario in PRESETS[args.preset]:
+            if args.scenario and scenario[0] not in args.scenario:
+                continue
+            scenarios.append(await run_scenario(engine, scenario, args.repeat, stages))
+    finally:
+        engine.worker_pool.shutdown()
+
+    return {
+        "benchmark": "manifest-engine",
+        "version": "1.3.0",
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "preset": args.preset,
+        "repeat": args.repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "device": engine.device,
+            "models": {name: engine.models.available(name) for name in ("whisper", "sentiment")},
+            "ffmpeg": engine.FFMPEG_AVAILABLE,
+            "moviepy": engine.MOVIEPY_AVAILABLE,
+            "render_engine": engine.default_render_engine()
+        },
+        "scenarios": scenarios
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Manifest Engine processing pipeline")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--scenario", action="append", help="only run these scenarios (repeatable)")
+    parser.add_argument("--stages", help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the median is reported")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--work-dir", help="keep generated videos and outputs here instead of a temp dir")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    data_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="manifest-bench-"))
+    try:
+        report = asyncio.run(run_benchmark(args, data_dir))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        print(f"Benchmark report written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(f"\nCompared with {baseline.get('commit') or args.compare}:")
+        for line in compare(report, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
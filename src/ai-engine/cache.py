@@ -0,0 +1,233 @@
+"""
+Manifest Engine v1.3 - Result Cache
+In-process LRU, local disk store and optional Redis, keyed on content and settings.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import BYTES_READ, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = int(os.environ.get("MANIFEST_CACHE_TTL", 3600))
+CACHE_MEMORY_ENTRIES = int(os.environ.get("MANIFEST_CACHE_MEMORY_ENTRIES", 128))
+CACHE_DISK_MB = int(os.environ.get("MANIFEST_CACHE_DISK_MB", 512))
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in chunks so large uploads never sit in memory"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+            BYTES_READ.inc(len(chunk), source="digest")
+    return digest.hexdigest()
+
+
+_digest_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digest_lock = threading.Lock()
+
+
+def cached_file_digest(path: Path, max_entries: int = 1024) -> str:
+    """file_digest, skipped when the same path, size and mtime were hashed before"""
+    stat = os.stat(path)
+    memo_key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            _digest_memo.move_to_end(memo_key)
+            return _digest_memo[memo_key]
+
+    digest = file_digest(path)
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+        while len(_digest_memo) > max_entries:
+            _digest_memo.popitem(last=False)
+    return digest
+
+
+def normalize_settings(settings: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in defaults and coerce numbers so equivalent settings hash the same
+
+    None and empty lists or dicts all mean "not set" and take the default,
+    so {"platforms": []} hashes like the default platforms None.
+    """
+    merged = dict(defaults)
+    merged.update({k: v for k, v in settings.items() if v is not None and v != [] and v != {}})
+    return {
+        key: float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for key, value in merged.items()
+    }
+
+
+def settings_digest(settings: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> str:
+    normalized = normalize_settings(settings, defaults or {})
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe LRU of serialized values with a per-entry expiry"""
+
+    def __init__(self, max_entries: int = CACHE_MEMORY_ENTRIES, ttl: int = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """One JSON file per key, expired by mtime and trimmed oldest-first to a size budget"""
+
+    def __init__(self, directory: Path, max_bytes: int = CACHE_DISK_MB * 1024 * 1024, ttl: int = CACHE_TTL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key.replace(':', '_')}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime + self.ttl < time.time():
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        if self.max_bytes <= 0:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(value)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            now = time.time()
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime + self.ttl < now:
+                    path.unlink(missing_ok=True)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+
+class LayeredCache:
+    """Look up memory, then disk, then Redis, promoting hits into the faster tiers"""
+
+    def __init__(self, memory: MemoryCache, disk: Optional[DiskCache] = None,
+                 redis_client: Any = None, ttl: int = CACHE_TTL, prefix: str = "video_analysis"):
+        self.memory = memory
+        self.disk = disk
+        self.redis = redis_client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def key(self, content_hash: str, settings_hash: str) -> str:
+        return f"{self.prefix}:{content_hash}:{settings_hash}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            CACHE_REQUESTS.inc(tier="memory", result="hit")
+            return json.loads(value)
+        CACHE_REQUESTS.inc(tier="memory", result="miss")
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                CACHE_REQUESTS.inc(tier="disk", result="hit")
+                self.memory.set(key, value)
+                return json.loads(value)
+            CACHE_REQUESTS.inc(tier="disk", result="miss")
+
+        if self.redis is not None:
+            try:
+                value = self.redis.get(key)
+                CACHE_REQUESTS.inc(tier="redis", result="miss" if value is None else "hit")
+            except Exception as e:
+                logger.debug(f"Redis cache read failed: {str(e)}")
+                CACHE_REQUESTS.inc(tier="redis", result="error")
+                value = None
+            if value is not None:
+                self.stats["redis_hits"] += 1
+                self.memory.set(key, value)
+                if self.disk is not None:
+                    try:
+                        self.disk.set(key, value)
+                    except OSError as e:
+                        logger.warning(f"Disk cache write failed: {str(e)}")
+                return json.loads(value)
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        value = json.dumps(result)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except OSError as e:
+                logger.warning(f"Disk cache write failed: {str(e)}")
+        if self.redis is not None:
+            try:
+                self.redis.setex(key, self.ttl, value)
+            except Exception as e:
+                logger.debug(f"Redis cache write failed: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.stats, memory_entries=len(self.memory), redis=self.redis is not None)
@@ -0,0 +1,316 @@
+"""
+Manifest Engine v1.3 - Shared Frame Source
+Open a video once and feed its sampled frames to every analysis stage.
+"""
+
+import os
+import time
+import logging
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metrics import STAGE_SECONDS, FRAMES_GRABBED, FRAMES_DECODED, BYTES_READ, span
+from render import FFMPEG_BIN, FFMPEG_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# "sequential" reads straight through with grab() and only retrieves sampled frames,
+# "seek" jumps to every sample with CAP_PROP_POS_FRAMES (slow on long-GOP H.264)
+READ_MODES = ("sequential", "seek")
+
+# Analysis frames are decoded no taller than this, none of the metrics need more. 0 reads full size.
+PROXY_HEIGHT = int(os.environ.get("MANIFEST_ANALYSIS_PROXY_HEIGHT", 360))
+
+
+@dataclass
+class VideoMetadata:
+    """Container-level properties read once when the source is opened"""
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.fps > 0 else 0
+
+
+class FrameConsumer:
+    """Base class for analysis stages that read frames from a FrameSource"""
+
+    def start(self, metadata: VideoMetadata) -> None:
+        pass
+
+    def feed(self, index: int, frame: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> Any:
+        return None
+
+
+class FrameSource:
+    """Single capture shared by the duration probe, scene detection and viral analysis
+
+    With reuse_buffer every sample is decoded into the same array, so a
+    consumer must copy anything it keeps past its feed() call.
+
+    With proxy_height, sequential reads go through ffmpeg, which selects the
+    samples and scales them down before they are converted and copied out,
+    so analysis never handles full-size frames. Seek mode always reads full size.
+    """
+
+    def __init__(self, video_path: Path, read_mode: str = "sequential", sample_rate: float = 1.0,
+                 reuse_buffer: bool = False, proxy_height: int = 0):
+        if read_mode not in READ_MODES:
+            raise ValueError(f"Unknown read mode: {read_mode}")
+        if sample_rate <= 0:
+            raise ValueError(f"Sample rate must be positive: {sample_rate}")
+        self.video_path = Path(video_path)
+        self.read_mode = read_mode
+        self.sample_rate = sample_rate
+        self.sample_step = 30
+        self.reuse_buffer = reuse_buffer
+        self.proxy_height = proxy_height
+        self._buffer: Optional[np.ndarray] = None
+        self.cap = None
+        self.metadata: Optional[VideoMetadata] = None
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self._consumed = False
+
+    def open(self) -> Optional[VideoMetadata]:
+        """Open the container and read its metadata, returns None if unreadable"""
+        if self.cap is not None:
+            return self.metadata
+
+        self.cap = cv2.VideoCapture(str(self.video_path))
+        if not self.cap.isOpened():
+            logger.warning(f"Could not open video: {self.video_path}")
+            self.cap.release()
+            self.cap = None
+            return None
+
+        try:
+            BYTES_READ.inc(Path(self.video_path).stat().st_size, source="decode")
+        except OSError:
+            pass
+        self.metadata = VideoMetadata(
+            fps=self.cap.get(cv2.CAP_PROP_FPS),
+            frame_count=int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            width=int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        if self.metadata.fps > 0:
+            self.sample_step = max(1, int(round(self.metadata.fps / self.sample_rate)))
+        return self.metadata
+
+    def sampled_frames(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (frame_index, frame) sample_rate times per second of video"""
+        if self.open() is None:
+            return
+        if self._consumed:
+            raise RuntimeError("FrameSource frames can only be read once, use run() to share them")
+        self._consumed = True
+
+        size = self.proxy_size() if self.read_mode == "sequential" else None
+        if size is not None:
+            yielded = False
+            for index, frame in self._proxy_frames(*size):
+                yielded = True
+                yield index, frame
+            if yielded or self.metadata.frame_count <= 0:
+                return
+            logger.warning(f"Proxy decode failed for {self.video_path}, reading full size")
+
+        if self.read_mode == "sequential":
+            yielded = False
+            for index, frame in self._sequential_frames():
+                yielded = True
+                yield index, frame
+            if yielded or self.metadata.frame_count <= 0:
+                return
+            # Some containers refuse linear reads, retry with the seek-based path
+            logger.warning(f"Sequential read failed for {self.video_path}, falling back to seeking")
+            self.read_mode = "seek"
+
+        yield from self._seek_frames()
+
+    def proxy_size(self) -> Optional[Tuple[int, int]]:
+        """(width, height) of proxy frames, None if frames are read at source size"""
+        metadata = self.metadata
+        if not self.proxy_height or not FFMPEG_AVAILABLE or metadata is None:
+            return None
+        if metadata.width <= 0 or metadata.height <= self.proxy_height:
+            return None
+        height = max(2, self.proxy_height // 2 * 2)
+        width = max(2, round(metadata.width * height / metadata.height / 2) * 2)
+        return width, height
+
+    def _proxy_frames(self, width: int, height: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """Every sample_step-th frame, scaled by ffmpeg and piped out as raw BGR"""
+        step = self.sample_step
+        if self.metadata.fps > 0:
+            # Samples are picked by time, so the decoder can drop frames nothing references
+            # and skip deblocking, which roughly halves H.264 decode cost at no cost to analysis
+            decode = ["-skip_frame", "noref", "-skip_loop_filter", "all"]
+            # round=up lands on frame k * step itself, the same frames _sequential_frames keeps
+            sample = f"fps={self.metadata.fps:.6f}/{step}:round=up"
+        else:
+            decode = []
+            sample = f"select='not(mod(n,{step}))'"
+        process = subprocess.Popen(
+            [FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error", *decode, "-i", str(self.video_path),
+             "-an", "-sn", "-dn",
+             "-vf", f"{sample},scale={width}:{height}:flags=bilinear",
+             "-fps_mode", "passthrough", "-pix_fmt", "bgr24", "-f", "rawvideo", "-"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        shape = (height, width, 3)
+        frame_bytes = width * height * 3
+        samples = 0
+        try:
+            while True:
+                if self._buffer is not None and self._buffer.shape == shape:
+                    frame = self._buffer
+                else:
+                    frame = np.empty(shape, dtype=np.uint8)
+                view = memoryview(frame).cast("B")
+                filled = 0
+                while filled < frame_bytes:
+                    count = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                if filled < frame_bytes:
+                    break
+                self._keep(frame)
+                self.frames_decoded += 1
+                yield samples * step, frame
+                samples += 1
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+            # ffmpeg still demuxes everything up to the last sample
+            self.frames_grabbed += min(samples * step, self.metadata.frame_count or samples * step)
+
+    def _sequential_frames(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Read forward once, decoding every frame but converting only the samples"""
+        step = self.sample_step
+        frame_count = self.metadata.frame_count
+
+        index = 0
+        while index < frame_count:
+            if not self.cap.grab():
+                break
+            self.frames_grabbed += 1
+            if index % step == 0:
+                ret, frame = self.cap.retrieve(self._buffer)
+                if not ret:
+                    break
+                self._keep(frame)
+                self.frames_decoded += 1
+                yield index, frame
+            index += 1
+
+    def _seek_frames(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Seek to every sample, each seek decodes forward from the previous keyframe"""
+        for i in range(0, self.metadata.frame_count, self.sample_step):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+            ret, frame = self.cap.read(self._buffer)
+            if not ret:
+                break
+            self._keep(frame)
+            self.frames_grabbed += 1
+            self.frames_decoded += 1
+            yield i, frame
+
+    def _keep(self, frame: np.ndarray) -> None:
+        """Decode the next sample into this frame's memory, OpenCV reallocates only if the size changes"""
+        if self.reuse_buffer:
+            self._buffer = frame
+
+    def run(self, consumers: List[FrameConsumer]) -> List[Any]:
+        """Decode once and hand every sampled frame to all consumers"""
+        if self.open() is None:
+            return [None for _ in consumers]
+
+        for consumer in consumers:
+            consumer.start(self.metadata)
+
+        for index, frame in self.sampled_frames():
+            for consumer in consumers:
+                consumer.feed(index, frame)
+
+        return [consumer.finish() for consumer in consumers]
+
+    def close(self) -> None:
+        self._buffer = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+            FRAMES_GRABBED.inc(self.frames_grabbed)
+            FRAMES_DECODED.inc(self.frames_decoded)
+
+    def __enter__(self) -> "FrameSource":
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class StageTimer:
+    """Collect wall-clock seconds per pipeline stage
+
+    on_stage, if given, is called with (stage, "running" | "done" | "failed")
+    and may raise to abort the pipeline before a stage starts. Every stage is
+    also traced and recorded in the stage duration histogram.
+
+    details holds wall and CPU seconds per stage plus anything noted while it
+    ran, for the per-request profile. CPU time is process-wide, so it includes
+    whatever concurrent requests did meanwhile.
+    """
+
+    def __init__(self, on_stage: Optional[Callable[[str, str], None]] = None):
+        self.timings: Dict[str, float] = {}
+        self.details: Dict[str, Dict[str, Any]] = {}
+        self.on_stage = on_stage
+        self.current: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.on_stage:
+            self.on_stage(name, "running")
+        self.current = name
+        details = self.details.setdefault(name, {})
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        state = "failed"
+        try:
+            with span(f"stage.{name}", stage=name):
+                yield
+            state = "done"
+        finally:
+            elapsed = time.perf_counter() - started
+            self.current = None
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 4)
+            details["seconds"] = self.timings[name]
+            details["cpu_seconds"] = round(details.get("cpu_seconds", 0.0) + time.process_time() - cpu_started, 4)
+            details["status"] = state
+            STAGE_SECONDS.observe(elapsed, stage=name, status=state)
+            logger.info(f"Stage {name} took {elapsed:.3f}s")
+            if self.on_stage:
+                self.on_stage(name, state)
+
+    def note(self, key: str, value: Any) -> None:
+        """Attach a detail to the running stage's profile entry"""
+        if self.current is not None:
+            self.details[self.current][key] = value
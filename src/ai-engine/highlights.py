@@ -0,0 +1,221 @@
+"""
+Manifest Engine v1.3 - Highlight Scoring
+Per-second motion, audio energy and keyword density features, and clip windows ranked on them.
+"""
+
+import math
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from frame_source import FrameConsumer, VideoMetadata
+from scene_detection import DEFAULT_THRESHOLD, to_luma_thumbnail, frame_differences
+from transcription import stream_audio
+from text_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SAMPLE_RATE = 8000   # plenty for loudness, and cheap to decode
+PEAK_WINDOW_SECONDS = 15   # loudness peaks are measured against this much surrounding audio
+PEAK_RANGE_DB = 12.0       # this far above the surrounding level counts as a full peak
+
+# How much each normalized feature contributes to a second's highlight score
+HIGHLIGHT_WEIGHTS = {"motion": 0.35, "audio": 0.3, "peaks": 0.15, "keywords": 0.2}
+
+
+class MotionTracker(FrameConsumer):
+    """Mean per-second motion from differences of downscaled luma frames
+
+    Runs in the same decode pass as scene detection. Differences above the
+    scene-cut threshold are capped there, so cuts don't read as motion.
+    """
+
+    def __init__(self, cut_threshold: float = DEFAULT_THRESHOLD, thumb_width: int = 64, batch_size: int = 64):
+        self.cut_threshold = cut_threshold
+        self.thumb_width = thumb_width
+        self.batch_size = batch_size
+
+    def start(self, metadata: VideoMetadata) -> None:
+        self.fps = metadata.fps
+        self.seconds = max(1, math.ceil(metadata.duration))
+        width = self.thumb_width
+        if metadata.width > 0 and metadata.height > 0:
+            height = max(1, round(width * metadata.height / metadata.width))
+        else:
+            height = max(1, width * 9 // 16)
+        self._thumb_size = (width, height)
+        self._batch = np.empty((self.batch_size + 1, height, width), dtype=np.uint8)
+        self._count = 0
+        self._indices: List[int] = []
+        self._has_prev = False
+        self._times: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+
+    def feed(self, index: int, frame: np.ndarray) -> None:
+        # Slot 0 holds the previous batch's last thumbnail
+        self._batch[self._count + 1] = to_luma_thumbnail(frame, *self._thumb_size)
+        self._indices.append(index)
+        self._count += 1
+        if self._count == self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._count == 0:
+            return
+        first = 0 if self._has_prev else 1
+        sequence = self._batch[first:self._count + 1]
+        if len(sequence) > 1:
+            diffs = np.minimum(frame_differences(sequence), self.cut_threshold)
+            indices = np.asarray(self._indices[first:], dtype=np.float64)
+            self._times.append(indices / self.fps if self.fps > 0 else indices)
+            self._values.append(diffs)
+        self._batch[0] = self._batch[self._count]
+        self._has_prev = True
+        self._count = 0
+        self._indices = []
+
+    def finish(self) -> List[float]:
+        self._flush()
+        if not self._values:
+            return []
+        times = np.concatenate(self._times)
+        values = np.concatenate(self._values)
+        seconds = np.minimum(times.astype(np.int64), self.seconds - 1)
+        totals = np.bincount(seconds, weights=values, minlength=self.seconds)
+        counts = np.bincount(seconds, minlength=self.seconds)
+        motion = np.divide(totals, counts, out=np.zeros(self.seconds), where=counts > 0)
+        return np.round(motion, 3).tolist()
+
+
+def audio_features(video_path: Path, sample_rate: int = AUDIO_SAMPLE_RATE) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-second RMS energy and loudness-peak strength (0-1) of the audio track. Blocking."""
+    rms_blocks = []
+    leftover = np.empty(0, dtype=np.float32)
+    for block in stream_audio(video_path, sample_rate=sample_rate, block_seconds=60.0):
+        block = np.concatenate([leftover, block]) if len(leftover) else block
+        whole = len(block) // sample_rate * sample_rate
+        seconds = block[:whole].reshape(-1, sample_rate)
+        rms_blocks.append(np.sqrt(np.mean(seconds * seconds, axis=1)))
+        leftover = block[whole:]
+    if len(leftover):
+        rms_blocks.append(np.sqrt(np.mean(leftover * leftover, keepdims=True)))
+
+    if not rms_blocks:
+        return np.zeros(0), np.zeros(0)
+    rms = np.concatenate(rms_blocks)
+
+    # A peak is a second much louder than the audio around it
+    loudness = 20 * np.log10(rms + 1e-6)
+    window = min(PEAK_WINDOW_SECONDS, len(loudness))
+    surrounding = np.convolve(loudness, np.ones(window) / window, mode="same")
+    peaks = np.clip((loudness - surrounding) / PEAK_RANGE_DB, 0.0, 1.0)
+    return rms, peaks
+
+
+def keyword_density(segments: List[Dict[str, Any]], keywords: Iterable[str], seconds: int) -> np.ndarray:
+    """Keyword mentions per second, each segment's hits spread evenly over its span"""
+    density = np.zeros(seconds)
+    keywords = set(keywords)
+    if not keywords or seconds <= 0:
+        return density
+    for segment in segments:
+        hits = sum(1 for word in tokenize(segment.get("text", "")) if word in keywords)
+        if not hits:
+            continue
+        start = min(seconds - 1, max(0, int(segment.get("start") or 0)))
+        end = min(seconds, max(start + 1, math.ceil(segment.get("end") or 0)))
+        density[start:end] += hits / (end - start)
+    return density
+
+
+def normalize(feature: np.ndarray) -> np.ndarray:
+    """Scale to 0-1 against the 95th percentile, so a few outliers don't flatten the rest"""
+    if feature.size == 0:
+        return feature
+    reference = np.percentile(feature, 95)
+    if reference <= 0:
+        reference = feature.max()
+    if reference <= 0:
+        return np.zeros_like(feature, dtype=np.float64)
+    return np.clip(feature / reference, 0.0, 1.0)
+
+
+def fit(feature: Optional[Iterable[float]], seconds: int) -> Optional[np.ndarray]:
+    """Pad or trim a per-second feature to the timeline, None if there is no data"""
+    if feature is None:
+        return None
+    feature = np.asarray(feature, dtype=np.float64)
+    if feature.size == 0:
+        return None
+    if feature.size >= seconds:
+        return feature[:seconds]
+    return np.pad(feature, (0, seconds - feature.size))
+
+
+def highlight_timeline(seconds: int, features: Dict[str, Optional[Iterable[float]]],
+                       weights: Dict[str, float] = HIGHLIGHT_WEIGHTS) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Weighted per-second score from the features that are available, plus each normalized feature"""
+    normalized = {}
+    for name, feature in features.items():
+        fitted = fit(feature, seconds)
+        if fitted is not None and name in weights:
+            normalized[name] = normalize(fitted)
+
+    score = np.zeros(seconds)
+    total = sum(weights[name] for name in normalized)
+    for name, feature in normalized.items():
+        score += feature * (weights[name] / total)
+    return score, normalized
+
+
+def window_means(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of every window-long run of values, one per start second"""
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    return (sums[window:] - sums[:-window]) / window
+
+
+def rank_windows(score: np.ndarray, features: Dict[str, np.ndarray], window: float, count: int,
+                 scenes: Optional[List[Dict[str, Any]]] = None, snap: float = 2.0,
+                 duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """The count best non-overlapping windows, starts snapped to a nearby scene cut
+
+    Only windows that end by duration are considered, the last partial
+    second is scored like a whole one and would otherwise let a window
+    overrun the source.
+    """
+    seconds = len(score)
+    if seconds == 0 or count <= 0:
+        return []
+    width = int(max(1, min(round(window), seconds)))
+    limit = min(float(duration), seconds) if duration else float(seconds)
+    length = min(float(width), limit)
+    means = window_means(score, width)
+    feature_means = {name: window_means(feature, width) for name, feature in features.items()}
+    cuts = np.asarray(sorted(scene["start"] for scene in scenes or []), dtype=np.float64)
+
+    # Starts whose window fits in the source, at least the first one
+    fitting = means[:max(1, math.floor(limit - length + 1e-6) + 1)]
+    chosen: List[int] = []
+    for start in np.argsort(-fitting, kind="stable"):
+        if all(abs(int(start) - other) >= width for other in chosen):
+            chosen.append(int(start))
+            if len(chosen) == count:
+                break
+
+    highlights = []
+    for start in chosen:
+        begin = float(start)
+        if cuts.size:
+            nearest = cuts[np.argmin(np.abs(cuts - begin))]
+            if abs(nearest - begin) <= snap and nearest + length <= limit:
+                begin = float(nearest)
+        highlight = {
+            "start": round(begin, 3),
+            "end": round(min(begin + length, limit), 3),
+            "score": round(float(means[start]), 4)
+        }
+        highlight.update({name: round(float(values[start]), 4) for name, values in feature_means.items()})
+        highlights.append(highlight)
+    return highlights
@@ -0,0 +1,437 @@
+"""
+Manifest Engine v1.3 - Job Queue
+Durable video processing jobs with per-stage progress, cancellation and retry.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlite_connection import ForkSafeConnection
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.environ.get("MANIFEST_JOB_BACKEND", "local")
+JOB_CONCURRENCY = int(os.environ.get("MANIFEST_JOB_CONCURRENCY", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("MANIFEST_JOB_MAX_ATTEMPTS", 2))
+# A running job's worker touches it this often, and it counts as abandoned once it hasn't for JOB_STALE_SECONDS
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("MANIFEST_JOB_HEARTBEAT_SECONDS", 15))
+JOB_STALE_SECONDS = float(os.environ.get("MANIFEST_JOB_STALE_SECONDS", 60))
+# An automatic retry waits this long, doubling with every attempt already made
+JOB_RETRY_BACKOFF_SECONDS = float(os.environ.get("MANIFEST_JOB_RETRY_BACKOFF_SECONDS", 30))
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised at a stage boundary once cancellation of the running job was requested"""
+
+
+class JobStore:
+    """SQLite record of every job, shared by the API and any worker on the same data volume"""
+
+    COLUMNS = ("id", "video_id", "filename", "settings", "status", "stage", "stages",
+               "result", "error", "attempts", "cancel_requested", "created_at", "updated_at",
+               "owner", "heartbeat_at")
+    JSON_COLUMNS = ("settings", "stages", "result")
+    # Added after the first release, stores created before then get them on open
+    ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        # Opened on first use in each process, a connection must not be inherited across fork
+        self._db = ForkSafeConnection(self._connect)
+
+    @property
+    def _lock(self) -> threading.Lock:
+        return self._db.lock
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """This process's connection, only used while holding _lock"""
+        return self._db.conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                video_id TEXT,
+                filename TEXT,
+                settings TEXT,
+                status TEXT,
+                stage TEXT,
+                stages TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                cancel_requested INTEGER DEFAULT 0,
+                created_at REAL,
+                updated_at REAL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        return conn
+
+    def _row(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def create(self, video_id: str, filename: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, video_id, filename, settings, status, stages, attempts, "
+                "cancel_requested, created_at, updated_at) VALUES (?, ?, ?, ?, 'queued', '{}', 0, 0, ?, ?)",
+                (job_id, video_id, filename, json.dumps(settings), now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def update(self, job_id: str, **fields) -> None:
+        for column in self.JSON_COLUMNS:
+            if column in fields:
+                fields[column] = json.dumps(fields[column])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def set_stage(self, job_id: str, stage: str, state: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            stages = json.loads(row[0]) if row and row[0] else {}
+            stages[stage] = state
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, stages = ?, updated_at = ? WHERE id = ?",
+                (stage, json.dumps(stages), time.time(), job_id)
+            )
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Atomically move a queued job to running under owner, False if another worker got it first"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, error = NULL, owner = ?, "
+                "heartbeat_at = ?, updated_at = ? WHERE id = ? AND status = 'queued' AND cancel_requested = 0",
+                (owner, now, now, job_id)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Touch a running job's heartbeat, returns whether its cancellation was requested"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                (time.time(), job_id, owner)
+            )
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def request_cancel(self, job_id: str) -> None:
+        """Flag the job, and cancel it outright if no worker has claimed it yet"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (now, job_id))
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled' WHERE id = ? AND status = 'queued'", (job_id,)
+            )
+
+    def requeue_stale(self, stale_after: float = JOB_STALE_SECONDS) -> List[str]:
+        """Running jobs whose worker stopped heartbeating go back to the queue, returns their IDs
+
+        Jobs other workers are still running keep fresh heartbeats and are left alone.
+        """
+        now = time.time()
+        cutoff = now - stale_after
+        requeued = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (cutoff,)
+            ).fetchall()
+            for (job_id,) in rows:
+                # Re-checked per row, so two workers reaping at once requeue each job once
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? WHERE id = ? "
+                    "AND status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                    (now, job_id, cutoff)
+                )
+                if cursor.rowcount == 1:
+                    requeued.append(job_id)
+        return requeued
+
+    def unfinished(self) -> List[str]:
+        """Jobs still waiting in the queue"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict({status: 0 for status in JOB_STATUSES}, **dict(rows))
+
+
+class JobManager:
+    """Runs jobs through the processor and records their progress in the store
+
+    Stages memoized by VideoProcessor are served from the cache on a retry,
+    so retrying a job only recomputes the stages that did not finish.
+
+    The store is only touched from threads: execute awaits its calls through
+    asyncio.to_thread and the API calls the rest from sync routes, so a busy
+    disk never holds up the event loop or a worker pool slot.
+    """
+
+    def __init__(self, store: JobStore, process: Callable[..., Awaitable[Any]],
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.store = store
+        self.process = process
+        self.max_attempts = max(1, max_attempts)
+        self.backend = None
+        # Jobs per status as of the last refresh, read by status() and the metrics gauges
+        self.counts: Dict[str, int] = {status: 0 for status in JOB_STATUSES}
+        # Running jobs to stop at their next stage, filled by cancel() and by the heartbeat
+        self._cancelling: Set[str] = set()
+
+    def submit(self, video_id: str, filename: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        job = self.store.create(video_id, filename, settings)
+        self.backend.enqueue(job["id"])
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        # A running job stops at its next stage boundary, one run by another process once it heartbeats
+        self.store.request_cancel(job_id)
+        self._cancelling.add(job_id)
+        return self.store.get(job_id)
+
+    def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in ("failed", "cancelled"):
+            return job
+        self.store.update(job_id, status="queued", error=None, cancel_requested=0, attempts=0)
+        self.backend.enqueue(job_id)
+        return self.store.get(job_id)
+
+    async def execute(self, job_id: str) -> None:
+        """Run one job to completion, failure, cancellation or an automatic retry"""
+        # Forked workers share the manager, so the owner is taken per call
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        if not await asyncio.to_thread(self.store.claim, job_id, owner):
+            return
+        job = await asyncio.to_thread(self.store.get, job_id)
+        attempts = job["attempts"]
+        if job["cancel_requested"]:
+            self._cancelling.add(job_id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, owner))
+        # Stage events are written in order by one task, progress runs on the event loop
+        stages: asyncio.Queue = asyncio.Queue()
+        recorder = asyncio.create_task(self._record_stages(job_id, stages))
+
+        def progress(stage: str, state: str) -> None:
+            if state == "running" and job_id in self._cancelling:
+                raise JobCancelled(job_id)
+            stages.put_nowait((stage, state))
+
+        try:
+            try:
+                analysis = await self.process(job["video_id"], job["filename"], job["settings"], progress=progress)
+            finally:
+                await stages.join()
+            await asyncio.to_thread(
+                self.store.update, job_id, status="completed", stage=None, result=analysis.model_dump()
+            )
+        except JobCancelled:
+            await asyncio.to_thread(self.store.update, job_id, status="cancelled")
+            logger.info(f"Job {job_id} cancelled")
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            if attempts < self.max_attempts:
+                delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+                logger.warning(f"Job {job_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+                await asyncio.to_thread(self.store.update, job_id, status="queued", error=error)
+                self.backend.enqueue(job_id, delay=delay)
+            else:
+                logger.error(f"Job {job_id} failed: {error}")
+                await asyncio.to_thread(self.store.update, job_id, status="failed", error=error)
+        finally:
+            heartbeat.cancel()
+            recorder.cancel()
+            self._cancelling.discard(job_id)
+
+    async def _record_stages(self, job_id: str, stages: asyncio.Queue) -> None:
+        while True:
+            stage, state = await stages.get()
+            try:
+                await asyncio.to_thread(self.store.set_stage, job_id, stage, state)
+            except Exception as e:
+                logger.warning(f"Recording stage {stage} of job {job_id} failed: {str(e)}")
+            finally:
+                stages.task_done()
+
+    async def _heartbeat(self, job_id: str, owner: str) -> None:
+        """Keep the job's heartbeat fresh for as long as it runs here, and pick up cancellation"""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                if await asyncio.to_thread(self.store.heartbeat, job_id, owner):
+                    self._cancelling.add(job_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {str(e)}")
+
+    async def refresh_counts(self) -> None:
+        self.counts = await asyncio.to_thread(self.store.counts)
+
+    async def reap(self) -> None:
+        """Requeue jobs abandoned by a worker that died and refresh the counts, on every API process
+
+        Runs whichever backend executes the jobs, the store's requeue is atomic
+        per job, so several API processes reaping at once requeue each job once.
+        """
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                for job_id in await asyncio.to_thread(self.store.requeue_stale):
+                    logger.warning(f"Job {job_id} stopped heartbeating, requeued")
+                    self.backend.enqueue(job_id)
+                await self.refresh_counts()
+            except Exception as e:
+                logger.error(f"Job reaper error: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        return dict(
+            {status: self.counts[status] for status in ("queued", "running")},
+            backend=self.backend.name
+        )
+
+
+class LocalJobBackend:
+    """In-process asyncio workers, the SQLite store makes queued jobs survive restarts"""
+
+    name = "local"
+
+    def __init__(self, manager: JobManager, concurrency: int = JOB_CONCURRENCY):
+        self.manager = manager
+        self.concurrency = max(1, concurrency)
+        self.queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._reaper: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        # Other API workers may share the store, so only jobs nobody heartbeats are taken back
+        await asyncio.to_thread(self.manager.store.requeue_stale)
+        for job_id in await asyncio.to_thread(self.manager.store.unfinished):
+            self.queue.put_nowait(job_id)
+        await self.manager.refresh_counts()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._reaper = asyncio.create_task(self.manager.reap())
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._reaper] if self._reaper else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.manager.execute(job_id)
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def enqueue(self, job_id: str, delay: float = 0) -> None:
+        if self._loop is None:
+            raise RuntimeError("Local job backend not started")
+        if delay > 0:
+            self._loop.call_soon_threadsafe(self._loop.call_later, delay, self.queue.put_nowait, job_id)
+        else:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, job_id)
+
+
+class CeleryJobBackend:
+    """Dispatch jobs to Celery workers over Redis, they record progress in the shared store"""
+
+    name = "celery"
+
+    def __init__(self, manager: JobManager, celery_app: Any):
+        self.manager = manager
+        self.celery_app = celery_app
+
+        @celery_app.task(name="manifest_engine.run_job")
+        def run_job(job_id: str) -> None:
+            asyncio.run(manager.execute(job_id))
+
+        self.task = run_job
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        # Queued jobs live in the broker, running ones whose worker died are only seen in the store
+        for job_id in await asyncio.to_thread(self.manager.store.requeue_stale):
+            logger.warning(f"Job {job_id} stopped heartbeating, requeued")
+            self.enqueue(job_id)
+        await self.manager.refresh_counts()
+        self._reaper = asyncio.create_task(self.manager.reap())
+
+    async def stop(self) -> None:
+        if self._reaper:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+
+    def enqueue(self, job_id: str, delay: float = 0) -> None:
+        self.task.apply_async((job_id,), countdown=delay or None)
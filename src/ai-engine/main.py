@@ -6,21 +6,49 @@ Create Anything. Manifest Everything.
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-import json
+import time
+import uuid
+import importlib.util
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 import uvicorn
 
-import cv2
 import numpy as np
+
+from frame_source import FrameSource, VideoMetadata, StageTimer, PROXY_HEIGHT
+from scene_detection import SceneDetector
+from highlights import MotionTracker, audio_features, keyword_density, highlight_timeline, rank_windows
+from workers import WorkerPool, WorkerPoolFull
+from memory_budget import MemoryBudget, MemoryBudgetExceeded, plan_job
+from single_flight import SingleFlight
+from analysis_store import AnalysisStore
+from cache import LayeredCache, MemoryCache, DiskCache, cached_file_digest, settings_digest
+from transcription import ChunkedTranscriber, trim_segments, CHUNKED_MIN_SECONDS, TRANSCRIBE_MODES
+from model_registry import ModelRegistry, PRELOAD_MODELS, PREWARM_MODELS
+from metrics import registry, traced, VIDEOS_PROCESSED, INFERENCE_SECONDS
+from batch import BATCH_CONCURRENCY, BATCH_MAX_VIDEOS, run_batch, ndjson
+from uploads import UPLOAD_OPENAPI, UploadTooLarge, UploadMissing, saved_upload
+from text_index import TextIndex
+from text_analysis import SentimentBatcher, build_windows, token_counter, max_window_tokens, positive_probability, overall_positivity
+from jobs import (
+    JobStore, JobManager, JobCancelled, LocalJobBackend, CeleryJobBackend,
+    JOB_BACKEND, JOB_STATUSES
+)
+from render import (
+    render_clip, render_clip_ffmpeg, render_clip_targets, export_targets, probe_source,
+    default_render_engine, FFMPEG_AVAILABLE, RENDER_ENGINES, VERTICAL_PLATFORMS
+)
+from thumbnails import extract_thumbnails
+
 try:
     from moviepy.editor import VideoFileClip, concatenate_videoclips
     MOVIEPY_AVAILABLE = True
@@ -41,13 +69,14 @@ except ImportError:
 
 try:
     import torch
-    from transformers import pipeline
+    # transformers takes seconds to import, it is only pulled in when the sentiment model loads
+    if importlib.util.find_spec("transformers") is None:
+        raise ImportError("transformers")
     TORCH_AVAILABLE = True
 except ImportError:
     print("Warning: Torch/Transformers not available - sentiment analysis disabled")
     TORCH_AVAILABLE = False
     torch = None
-    pipeline = None
 
 try:
     import redis
@@ -78,11 +107,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the job workers and resume any jobs queued before a restart
+    await job_manager.backend.start()
+    if PREWARM_MODELS and not PRELOAD_MODELS:
+        models.prewarm()
+    yield
+    await job_manager.backend.stop()
+    worker_pool.shutdown()
+    if chunked_transcriber:
+        chunked_transcriber.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Manifest Engine AI",
     description="AI-powered video processing engine",
-    version="1.3.0"
+    version="1.3.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -102,25 +144,69 @@ else:
     device = "cpu"
     logger.info("Torch not available - using CPU mode")
 
-# Load Whisper model if available
+# Models load on first use, so startup and /health don't wait for them
+models = ModelRegistry()
+
+def load_sentiment_analyzer():
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", device=0 if device == "cuda" else -1)
+
 if WHISPER_AVAILABLE and whisper:
-    try:
-        whisper_model = whisper.load_model("base", device=device)
-    except:
-        print("Warning: Could not load Whisper model")
-        whisper_model = None
-else:
-    whisper_model = None
+    models.register("whisper", lambda: whisper.load_model("base", device=device))
+if TORCH_AVAILABLE:
+    models.register("sentiment", load_sentiment_analyzer)
 
-# Load sentiment analyzer if available
-if TORCH_AVAILABLE and pipeline:
-    try:
-        sentiment_analyzer = pipeline("sentiment-analysis", device=0 if device == "cuda" else -1)
-    except:
-        print("Warning: Could not load sentiment analyzer")
-        sentiment_analyzer = None
+# Sentiment windows from concurrent jobs share pipeline batches
+sentiment_batcher = SentimentBatcher(lambda: models.get("sentiment"))
+
+# Long media is transcribed in silence-split chunks across worker processes
+if models.available("whisper") and FFMPEG_AVAILABLE:
+    chunked_transcriber = ChunkedTranscriber("base", device)
+    if device == "cuda":
+        # One model copy per GPU, parallel CPU workers would each load their own
+        chunked_transcriber.processes = 1
 else:
-    sentiment_analyzer = None
+    chunked_transcriber = None
+
+# Bounded pool for the blocking Whisper / OpenCV / MoviePy work
+worker_pool = WorkerPool()
+
+# Memory reserved by running jobs, large ones wait here until the node has room
+memory_budget = MemoryBudget()
+
+# Shared with the Node backend, which serves uploads and clips from the same tree
+DATA_DIR = Path(os.environ.get("MANIFEST_DATA_DIR", "../../data"))
+
+# Defaults for every setting that changes the analysis result, used to normalize cache keys
+DEFAULT_SETTINGS = {
+    "transcribe": True,
+    "detectScenes": True,
+    "analyzeViral": True,
+    "generateClips": True,
+    "numClips": 5,
+    "clipDuration": 30,
+    "platform": "youtube_short",
+    "sceneSampleRate": 1.0,
+    "sceneThreshold": 30.0,
+    "sceneMetric": "diff",
+    "sceneHistThreshold": 0.4,
+    "renderEngine": default_render_engine(),
+    "clipSelection": "highlights",
+    "platforms": None,
+    "exportRenditions": 1,
+    "analysisProxyHeight": PROXY_HEIGHT
+}
+
+# Settings that only change how the work is done, not its result
+CACHE_NEUTRAL_SETTINGS = {"sceneReadMode", "transcribeMode", "profile", "executionMode", "memoryBudgetMb"}
+
+# Settings each memoized stage actually depends on
+SCENE_SETTINGS = ("sceneSampleRate", "sceneThreshold", "sceneMetric", "sceneHistThreshold", "analysisProxyHeight")
+CLIP_SETTINGS = ("numClips", "clipDuration", "platform", "renderEngine", "clipSelection",
+                 "platforms", "exportRenditions")
+
+# "highlights" ranks windows on motion, audio energy and keywords, "scenes" takes the longest scenes
+CLIP_SELECTIONS = ("highlights", "scenes")
 
 # Data models
 class VideoProcessRequest(BaseModel):
@@ -128,14 +214,23 @@ class VideoProcessRequest(BaseModel):
     filename: str
     settings: Dict[str, Any]
 
+class BatchProcessRequest(BaseModel):
+    videos: List[VideoProcessRequest]
+    concurrency: Optional[int] = None
+
 class VideoAnalysis(BaseModel):
     transcript: Optional[str]
+    transcript_segments: List[Dict[str, Any]] = []
+    sentiment_segments: List[Dict[str, Any]] = []
     keywords: List[str]
     viral_score: float
     suggested_titles: List[str]
     suggested_hashtags: List[str]
     scenes: List[Dict[str, Any]]
+    highlights: List[Dict[str, Any]] = []
     clips: List[Dict[str, Any]]
+    timings: Optional[Dict[str, float]] = None
+    profile: Optional[Dict[str, Any]] = None
 
 class ClipData(BaseModel):
     filename: str
@@ -145,214 +240,497 @@ class ClipData(BaseModel):
     platform: str
     viral_score: float
     thumbnail: Optional[str]
+    thumbnail_preview: Optional[str] = None
 
 # Video Processing Class
 class VideoProcessor:
-    def __init__(self):
-        self.upload_dir = Path("../../data/uploads")
-        self.clips_dir = Path("../../data/clips")
-        self.processed_dir = Path("../../data/processed")
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.upload_dir = data_dir / "uploads"
+        self.clips_dir = data_dir / "clips"
+        self.processed_dir = data_dir / "processed"
+        self.cache_dir = data_dir / "cache"
         
         # Create directories if they don't exist
-        for dir_path in [self.upload_dir, self.clips_dir, self.processed_dir]:
+        for dir_path in [self.upload_dir, self.clips_dir, self.processed_dir, self.cache_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
+        
+        # Keyword indexes of videos still being transcribed, by video ID
+        self.live_text: Dict[str, TextIndex] = {}
+        
+        # Results are keyed on file content + settings, Redis is shared between workers when present
+        self.cache = LayeredCache(
+            MemoryCache(),
+            DiskCache(self.cache_dir),
+            redis_client if REDIS_AVAILABLE else None
+        )
+        
+        # Duplicate requests in flight share one pipeline run, across workers through a Redis lock
+        self.single_flight = SingleFlight(redis_client if REDIS_AVAILABLE else None)
+        
+        # Finished analyses by video ID, queried by the /videos routes without reopening the video
+        self.analysis_store = AnalysisStore(data_dir / "analysis.db")
+    
+    def cache_key(self, content_hash: str, settings: Dict[str, Any]) -> str:
+        """Content hash of the upload plus a digest of the normalized settings"""
+        relevant = {k: v for k, v in settings.items() if k not in CACHE_NEUTRAL_SETTINGS}
+        return self.cache.key(content_hash, settings_digest(relevant, DEFAULT_SETTINGS))
+    
+    def stage_inputs(self, content_hash: str, settings: Dict[str, Any], names: tuple) -> Dict[str, Any]:
+        """The file plus the named settings, with defaults filled in"""
+        inputs = {name: settings.get(name, DEFAULT_SETTINGS[name]) for name in names}
+        inputs["file"] = content_hash
+        return inputs
+    
+    async def memoized(self, stage: str, inputs: Dict[str, Any], compute, valid=None,
+                       timer: Optional[StageTimer] = None) -> Any:
+        """Return a stage's cached output for these exact inputs, or compute and store it"""
+        key = self.cache.key(stage, settings_digest(inputs))
+        cached = await worker_pool.run(self.cache.get, key)
+        if cached is not None and (valid is None or valid(cached["value"])):
+            logger.info(f"Stage {stage} served from cache")
+            if timer:
+                timer.note("cache", "hit")
+            return cached["value"]
+        if timer:
+            timer.note("cache", "miss")
+        
+        value = await compute()
+        # Empty output usually means a failed or unavailable stage, don't pin it
+        if value:
+            await worker_pool.run(self.cache.set, key, {"value": value})
+        return value
     
-    async def process_video(self, video_id: str, filename: str, settings: Dict[str, Any]) -> VideoAnalysis:
-        """Main video processing pipeline"""
+    @traced("process_video")
+    async def process_video(self, video_id: str, filename: str, settings: Dict[str, Any],
+                            progress: Optional[Callable[[str, str], None]] = None) -> VideoAnalysis:
+        """Main video processing pipeline, progress is called with (stage, state) as stages run
+        
+        Calls for the same file and settings while one is already running wait
+        for its result instead of running the pipeline again. The run's stages
+        are reported to their progress too, so a waiting job shows them and its
+        cancellation takes effect at the run's next stage boundary.
+        """
+        video_path = self.upload_dir / filename
+        if not video_path.exists():
+            return await self.run_pipeline(video_id, filename, settings, progress)
+        
+        content_hash = await worker_pool.run(cached_file_digest, video_path)
+        cache_key = self.cache_key(content_hash, settings)
+        
+        async def lookup() -> Optional[VideoAnalysis]:
+            cached = await worker_pool.run(self.cache.get, cache_key)
+            return VideoAnalysis(**cached) if cached else None
+        
+        analysis, shared = await self.single_flight.run(
+            cache_key,
+            # The run's stage events reach this call's progress and every caller attached to it
+            lambda notify: self.run_pipeline(video_id, filename, settings, notify),
+            lookup=lookup,
+            # A cancelled job must not fail the requests waiting on it
+            retry_on=(JobCancelled,),
+            progress=progress
+        )
+        if shared:
+            logger.info(f"Served {filename} from a concurrent run")
+            VIDEOS_PROCESSED.inc(status="coalesced")
+            if not await worker_pool.run(self.analysis_store.has, video_id):
+                # The run that produced it indexed it under its own video ID
+                await self.index_analysis(video_id, content_hash, filename, analysis.model_dump())
+            analysis = analysis.model_copy(update={"profile": {"coalesced": True} if settings.get("profile") else None})
+        return analysis
+    
+    async def run_pipeline(self, video_id: str, filename: str, settings: Dict[str, Any],
+                           progress: Optional[Callable[[str, str], None]] = None) -> VideoAnalysis:
+        """One uncoalesced run of the pipeline
+        
+        settings["profile"] adds a per-stage breakdown (wall and CPU seconds,
+        stage cache hits, frames read) to the response.
+        
+        settings["executionMode"] "streaming" bounds memory for long and 4K inputs:
+        one reused frame buffer, chunked transcription and one clip render at a
+        time. "auto" (the default) streams jobs estimated over their budget.
+        """
+        started = time.perf_counter()
+        reserved = 0.0
         try:
             video_path = self.upload_dir / filename
             
             if not video_path.exists():
                 raise FileNotFoundError(f"Video file not found: {filename}")
             
+            # Duplicate uploads and repeated requests are served from the cache
+            content_hash = await worker_pool.run(cached_file_digest, video_path)
+            cache_key = self.cache_key(content_hash, settings)
+            cached = await worker_pool.run(self.cache.get, cache_key)
+            if cached:
+                logger.info(f"Cache hit for video: {filename}")
+                VIDEOS_PROCESSED.inc(status="cached")
+                if not await worker_pool.run(self.analysis_store.has, video_id):
+                    # Same content under a new video ID, index what the cache has
+                    await self.index_analysis(video_id, content_hash, filename, cached)
+                analysis = VideoAnalysis(**cached)
+                if settings.get("profile"):
+                    analysis.profile = {"cache": "hit", "total_seconds": round(time.perf_counter() - started, 4)}
+                return analysis
+            
             logger.info(f"Processing video: {filename}")
             
             # Initialize results
             results = {
                 "transcript": None,
+                "transcript_segments": [],
+                "sentiment_segments": [],
                 "keywords": [],
                 "viral_score": 0.0,
                 "suggested_titles": [],
                 "suggested_hashtags": [],
                 "scenes": [],
+                "highlights": [],
                 "clips": [],
                 "duration": 0
             }
             
-            # Get video duration using OpenCV
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                results["duration"] = frame_count / fps if fps > 0 else 0
-                cap.release()
+            timer = StageTimer(on_stage=progress)
             
-            # Step 1: Transcribe audio if requested and available
-            if settings.get("transcribe", True) and whisper_model:
-                logger.info("Transcribing audio...")
-                transcript = await self.transcribe_audio(video_path)
-                results["transcript"] = transcript
-                results["keywords"] = self.extract_keywords(transcript)
-            
-            # Step 2: Detect scenes
-            if settings.get("detectScenes", True):
-                logger.info("Detecting scenes...")
-                scenes = await self.detect_scenes(video_path)
-                results["scenes"] = scenes
+            # Open the video once and share it between the analysis stages
+            with timer.stage("probe"):
+                source = FrameSource(
+                    video_path,
+                    read_mode=settings.get("sceneReadMode", "sequential"),
+                    sample_rate=float(settings.get("sceneSampleRate", 1.0)),
+                    # Analysis reads a downscaled proxy, only generate_clips touches the full-size source
+                    proxy_height=int(settings.get("analysisProxyHeight", PROXY_HEIGHT))
+                )
+                metadata = await worker_pool.run(source.open)
+                if metadata:
+                    results["duration"] = metadata.duration
             
-            # Step 3: Analyze for viral potential
-            if settings.get("analyzeViral", True):
-                logger.info("Analyzing viral potential...")
-                viral_analysis = await self.analyze_viral_potential(video_path, results.get("transcript"))
-                results["viral_score"] = viral_analysis["score"]
-                results["suggested_titles"] = viral_analysis["titles"]
-                results["suggested_hashtags"] = viral_analysis["hashtags"]
+            try:
+                # Plan within the job's memory budget, then wait until the node has room for it
+                plan = plan_job(metadata, settings)
+                with timer.stage("admit"):
+                    timer.note("execution_mode", plan.mode)
+                    timer.note("memory_mb", plan.memory_mb)
+                    reserved = await memory_budget.acquire(plan.memory_mb)
+                if plan.streaming:
+                    source.reuse_buffer = True
+                    settings = dict(settings, executionMode="streaming", transcribeMode="chunked")
+                
+                # Step 1: Transcribe audio if requested and available
+                if settings.get("transcribe", True) and models.available("whisper"):
+                    logger.info("Transcribing audio...")
+                    with timer.stage("transcribe"):
+                        # Chunked transcription feeds the index as chunks finish, see /keywords/{video_id}
+                        text_index = TextIndex()
+                        self.live_text[video_id] = text_index
+                        # Depends on the file only
+                        transcription = await self.memoized(
+                            "transcription", {"file": content_hash},
+                            lambda: self.transcribe_audio(
+                                video_path,
+                                mode=settings.get("transcribeMode", "auto"),
+                                duration=results["duration"],
+                                on_chunk=lambda chunk: text_index.add(chunk["text"])
+                            ),
+                            timer=timer
+                        )
+                        results["transcript"] = transcription.get("text", "")
+                        results["transcript_segments"] = transcription.get("segments", [])
+                        if not results["transcript"]:
+                            text_index = TextIndex()
+                        elif not len(text_index):
+                            # Cached or transcribed whole, nothing was fed in yet
+                            text_index.add(results["transcript"])
+                        self.live_text[video_id] = text_index
+                        results["keywords"] = text_index.keywords()
+                
+                # Step 2: Detect scenes, measuring motion in the same decode pass
+                motion = None
+                audio = {}
+                if settings.get("detectScenes", True):
+                    logger.info("Detecting scenes...")
+                    with timer.stage("detect_scenes"):
+                        # Depends on the file plus the detection parameters
+                        frames = await self.memoized(
+                            "frames", self.stage_inputs(content_hash, settings, SCENE_SETTINGS),
+                            lambda: self.scan_frames(video_path, source, settings),
+                            timer=timer
+                        )
+                        results["scenes"] = frames.get("scenes", [])
+                        motion = frames.get("motion")
+                
+                # Step 3: Score highlights for clip selection and the viral score
+                if settings.get("generateClips", True) or settings.get("analyzeViral", True):
+                    logger.info("Scoring highlights...")
+                    with timer.stage("score_highlights"):
+                        # Audio energy depends on the file only, the scoring itself is cheap
+                        audio = await self.memoized(
+                            "audio", {"file": content_hash},
+                            lambda: self.audio_energy(video_path),
+                            timer=timer
+                        )
+                        results["highlights"] = await worker_pool.run(
+                            self.score_highlights, results, motion, audio, settings
+                        )
+                
+                # Step 4: Analyze for viral potential
+                if settings.get("analyzeViral", True):
+                    if results.get("transcript") and models.available("sentiment"):
+                        logger.info("Analyzing transcript sentiment...")
+                        with timer.stage("analyze_text"):
+                            # Depends on the file's transcript
+                            results["sentiment_segments"] = await self.memoized(
+                                "sentiment", {"file": content_hash, "transcript": results["transcript"]},
+                                lambda: self.analyze_text(results["transcript"], results["transcript_segments"]),
+                                timer=timer
+                            )
+                    
+                    logger.info("Analyzing viral potential...")
+                    with timer.stage("analyze_viral"):
+                        # Depends on the file and whatever transcript it was given
+                        viral_analysis = await self.memoized(
+                            "viral", {
+                                "file": content_hash,
+                                "transcript": results.get("transcript") or "",
+                                "highlights": [highlight["score"] for highlight in results["highlights"]]
+                            },
+                            lambda: self.analyze_viral_potential(
+                                video_path, results.get("transcript"), metadata=metadata,
+                                sentiment=results["sentiment_segments"], highlights=results["highlights"],
+                                keywords=results["keywords"]
+                            ),
+                            timer=timer
+                        )
+                        results["viral_score"] = viral_analysis["score"]
+                        results["suggested_titles"] = viral_analysis["titles"]
+                        results["suggested_hashtags"] = viral_analysis["hashtags"]
+            finally:
+                source.close()
+                self.live_text.pop(video_id, None)
             
-            # Step 4: Generate clips if MoviePy is available
-            if settings.get("generateClips", True) and MOVIEPY_AVAILABLE:
+            # Step 5: Generate clips if ffmpeg or MoviePy is available
+            if settings.get("generateClips", True) and (FFMPEG_AVAILABLE or MOVIEPY_AVAILABLE):
                 logger.info("Generating clips...")
-                video = VideoFileClip(str(video_path))
-                clips = await self.generate_clips(video, results["scenes"], settings)
-                results["clips"] = clips
-                video.close()
-            
-            # Cache results if Redis is available
-            if REDIS_AVAILABLE and redis_client:
-                try:
-                    redis_client.setex(
-                        f"video_analysis:{video_id}",
-                        3600,  # Cache for 1 hour
-                        json.dumps(results)
+                with timer.stage("generate_clips"):
+                    # Depends on the scenes and highlights plus the clip settings, reused only while the files exist
+                    clip_inputs = self.stage_inputs(content_hash, settings, CLIP_SETTINGS)
+                    clip_inputs["scenes"] = results["scenes"]
+                    clip_inputs["highlights"] = results["highlights"]
+                    clips = await self.memoized(
+                        "clips", clip_inputs,
+                        lambda: self.generate_clips(video_path, results["scenes"], settings, highlights=results["highlights"]),
+                        valid=lambda cached: all((self.clips_dir / clip["filename"]).exists() for clip in cached),
+                        timer=timer
                     )
-                except:
-                    pass
+                    results["clips"] = clips
+            
+            results["timings"] = timer.timings
+            
+            await self.index_analysis(video_id, content_hash, filename, results, {
+                "motion": motion,
+                "audio_rms": audio.get("rms"),
+                "audio_peaks": audio.get("peaks")
+            })
+            
+            # Cache results
+            await worker_pool.run(self.cache.set, cache_key, results)
+            
+            if settings.get("profile"):
+                results["profile"] = {
+                    "cache": "miss",
+                    "total_seconds": round(time.perf_counter() - started, 4),
+                    "stages": timer.details,
+                    "frames_grabbed": source.frames_grabbed,
+                    "frames_decoded": source.frames_decoded
+                }
             
             logger.info(f"Processing complete for video: {filename}")
+            VIDEOS_PROCESSED.inc(status="completed")
             return VideoAnalysis(**results)
             
+        except JobCancelled:
+            VIDEOS_PROCESSED.inc(status="cancelled")
+            raise
+        except MemoryBudgetExceeded as e:
+            VIDEOS_PROCESSED.inc(status="refused")
+            raise HTTPException(status_code=503, detail=str(e))
+        except HTTPException:
+            VIDEOS_PROCESSED.inc(status="failed")
+            raise
         except Exception as e:
             logger.error(f"Error processing video: {str(e)}")
+            VIDEOS_PROCESSED.inc(status="failed")
             raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            memory_budget.release(reserved)
+    
+    async def index_analysis(self, video_id: str, content_hash: str, filename: str, results: Dict[str, Any],
+                             features: Optional[Dict[str, Any]] = None) -> None:
+        """Store the analysis for later queries, a failure here never fails the request"""
+        try:
+            await worker_pool.run(self.analysis_store.put, video_id, content_hash, filename, results, features)
+        except Exception as e:
+            logger.warning(f"Could not index analysis of {video_id}: {str(e)}")
     
-    async def transcribe_audio(self, video_path: Path) -> str:
-        """Transcribe audio using Whisper"""
-        if not whisper_model:
-            return ""
+    async def transcribe_audio(self, video_path: Path, mode: str = "auto", duration: Optional[float] = None,
+                               on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Transcribe audio using Whisper, returns {"text", "segments"} or {} on failure
+        
+        mode "chunked" streams the audio, splits it at silences and transcribes the
+        chunks in parallel; "auto" does so for media longer than CHUNKED_MIN_SECONDS.
+        """
+        if mode not in TRANSCRIBE_MODES:
+            raise ValueError(f"Unknown transcribe mode: {mode}")
+        
+        use_chunks = chunked_transcriber is not None and (
+            mode == "chunked" or (mode == "auto" and (duration or 0) >= CHUNKED_MIN_SECONDS)
+        )
         
         try:
-            result = whisper_model.transcribe(str(video_path))
-            return result["text"]
+            if use_chunks:
+                with INFERENCE_SECONDS.time(model="whisper_chunked"):
+                    return await worker_pool.run(chunked_transcriber.transcribe, video_path, on_chunk)
+            
+            whisper_model = await worker_pool.run(models.get, "whisper")
+            if not whisper_model:
+                return {}
+            with INFERENCE_SECONDS.time(model="whisper"):
+                result = await worker_pool.run(whisper_model.transcribe, str(video_path))
+            return {"text": result["text"], "segments": trim_segments(result.get("segments", []))}
         except Exception as e:
             logger.error(f"Transcription error: {str(e)}")
-            return ""
+            return {}
     
     def extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from transcript"""
         if not text:
             return []
-        
-        # Simple keyword extraction
-        import re
-        from collections import Counter
-        
-        # Remove common stop words
-        stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                         'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were'])
-        
-        # Extract words
-        words = re.findall(r'\b[a-z]+\b', text.lower())
-        words = [w for w in words if w not in stop_words and len(w) > 3]
-        
-        # Get most common words
-        word_freq = Counter(words)
-        keywords = [word for word, _ in word_freq.most_common(10)]
-        
-        return keywords
+        return TextIndex.from_text(text).keywords()
     
-    async def detect_scenes(self, video_path: Path) -> List[Dict[str, Any]]:
+    async def detect_scenes(self, video_path: Path, source: Optional[FrameSource] = None,
+                            settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Detect scene changes in video"""
-        scenes = []
-        cap = cv2.VideoCapture(str(video_path))
+        settings = settings or {}
+        owns_source = source is None
+        if owns_source:
+            source = FrameSource(
+                video_path,
+                sample_rate=float(settings.get("sceneSampleRate", 1.0)),
+                proxy_height=int(settings.get("analysisProxyHeight", PROXY_HEIGHT))
+            )
         
-        if not cap.isOpened():
-            return scenes
+        try:
+            scenes, = await worker_pool.run(source.run, [SceneDetector.from_settings(settings)])
+        finally:
+            if owns_source:
+                source.close()
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return scenes or []
+    
+    async def scan_frames(self, video_path: Path, source: FrameSource, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Scene cuts and per-second motion from one decode pass, {} if the video can't be read"""
+        detector = SceneDetector.from_settings(settings)
+        scenes, motion = await worker_pool.run(source.run, [detector, MotionTracker(cut_threshold=detector.threshold)])
+        if not scenes:
+            return {}
+        return {"scenes": scenes, "motion": motion}
+    
+    async def audio_energy(self, video_path: Path) -> Dict[str, List[float]]:
+        """Per-second RMS and loudness peaks of the audio track, {} without ffmpeg or audio"""
+        if not FFMPEG_AVAILABLE:
+            return {}
+        try:
+            rms, peaks = await worker_pool.run(audio_features, video_path)
+        except Exception as e:
+            logger.warning(f"Audio analysis failed: {str(e)}")
+            return {}
+        if not len(rms):
+            return {}
+        return {"rms": np.round(rms, 5).tolist(), "peaks": np.round(peaks, 4).tolist()}
+    
+    def score_highlights(self, results: Dict[str, Any], motion: Optional[List[float]],
+                         audio: Dict[str, List[float]], settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rank clip-length windows on per-second motion, audio energy and keyword density"""
+        seconds = int(np.ceil(results.get("duration") or 0))
+        if seconds <= 0:
+            return []
         
-        # Simple scene detection based on frame differences
-        prev_frame = None
-        scene_start = 0
-        threshold = 30  # Adjust based on needs
+        score, features = highlight_timeline(seconds, {
+            "motion": motion,
+            "audio": audio.get("rms"),
+            "peaks": audio.get("peaks"),
+            "keywords": keyword_density(results["transcript_segments"], results["keywords"], seconds)
+        })
+        return rank_windows(
+            score,
+            features,
+            float(settings.get("clipDuration", 30)),
+            int(settings.get("numClips", 5)),
+            scenes=results["scenes"],
+            duration=results["duration"]
+        )
+    
+    async def analyze_text(self, transcript: str, segments: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Score the whole transcript for sentiment in token-bounded windows"""
+        sentiment_analyzer = await worker_pool.run(models.get, "sentiment")
+        if sentiment_analyzer is None:
+            return []
         
-        for i in range(0, frame_count, int(fps) if fps > 0 else 30):  # Check every second
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            if prev_frame is not None:
-                diff = cv2.absdiff(prev_frame, gray)
-                mean_diff = np.mean(diff)
-                
-                if mean_diff > threshold:
-                    # Scene change detected
-                    scenes.append({
-                        "start": scene_start / fps if fps > 0 else 0,
-                        "end": i / fps if fps > 0 else 0,
-                        "duration": (i - scene_start) / fps if fps > 0 else 0
-                    })
-                    scene_start = i
-            
-            prev_frame = gray
-        
-        # Add final scene
-        if scene_start < frame_count and fps > 0:
-            scenes.append({
-                "start": scene_start / fps,
-                "end": frame_count / fps,
-                "duration": (frame_count - scene_start) / fps
-            })
+        try:
+            # Whisper segments keep their timestamps, a bare transcript is windowed as one long segment
+            windows = await worker_pool.run(
+                build_windows,
+                segments or [{"start": None, "end": None, "text": transcript}],
+                token_counter(sentiment_analyzer),
+                max_window_tokens(sentiment_analyzer)
+            )
+            results = await asyncio.wrap_future(sentiment_batcher.submit([window["text"] for window in windows]))
+        except Exception as e:
+            logger.warning(f"Sentiment analysis failed: {str(e)}")
+            return []
         
-        cap.release()
-        return scenes
+        return [
+            dict(window, label=result["label"], score=round(result["score"], 4),
+                 positive=round(positive_probability(result), 4))
+            for window, result in zip(windows, results)
+        ]
     
-    async def analyze_viral_potential(self, video_path: Path, transcript: Optional[str]) -> Dict[str, Any]:
+    async def analyze_viral_potential(self, video_path: Path, transcript: Optional[str],
+                                      metadata: Optional[VideoMetadata] = None,
+                                      sentiment: Optional[List[Dict[str, Any]]] = None,
+                                      highlights: Optional[List[Dict[str, Any]]] = None,
+                                      keywords: Optional[List[str]] = None) -> Dict[str, Any]:
         """Analyze video for viral potential"""
         score = 0.0
         titles = []
         hashtags = []
         
+        # Reuse the metadata probed by process_video instead of reopening the file
+        if metadata is None:
+            source = FrameSource(video_path)
+            try:
+                metadata = await worker_pool.run(source.open)
+            finally:
+                source.close()
+        
         # Analyze visual quality
-        cap = cv2.VideoCapture(str(video_path))
-        if cap.isOpened():
-            # Check resolution
-            width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-            height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            
+        if metadata:
             # Higher quality = higher viral potential
-            if width >= 1920 and height >= 1080:
+            if metadata.width >= 1920 and metadata.height >= 1080:
                 score += 20
-            elif width >= 1280 and height >= 720:
+            elif metadata.width >= 1280 and metadata.height >= 720:
                 score += 10
             
-            if fps >= 30:
+            if metadata.fps >= 30:
                 score += 10
-            
-            cap.release()
         
         # Analyze transcript sentiment if available
-        if transcript and sentiment_analyzer:
-            try:
-                sentiment = sentiment_analyzer(transcript[:512])  # Limit text length
-                if sentiment[0]['label'] == 'POSITIVE':
-                    score += sentiment[0]['score'] * 30
-            except:
-                pass
+        if transcript and models.available("sentiment"):
+            if sentiment is None:
+                sentiment = await self.analyze_text(transcript)
+            positivity = overall_positivity(sentiment)
+            if positivity > 0.5:
+                score += positivity * 30
             
             # Generate titles based on content
             words = transcript.split()[:20]
@@ -362,14 +740,18 @@ class VideoProcessor:
                 f"This Changed Everything: {' '.join(words[:7])}"
             ]
             
-            # Generate hashtags
-            keywords = self.extract_keywords(transcript)
+            # Generate hashtags, from the keywords process_video already extracted when given
+            if keywords is None:
+                keywords = self.extract_keywords(transcript)
             hashtags = [f"#{kw}" for kw in keywords[:5]]
             hashtags.extend(["#viral", "#trending", "#fyp", "#foryou", "#mustwatch"])
         
-        # Random boost for demonstration
-        import random
-        score += random.randint(10, 40)
+        # Engagement from the strongest highlight window, a random boost when nothing was scored
+        if highlights:
+            score += 10 + 30 * max(highlight["score"] for highlight in highlights)
+        else:
+            import random
+            score += random.randint(10, 40)
         
         # Normalize score to 0-100
         score = min(100, max(0, score))
@@ -380,105 +762,294 @@ class VideoProcessor:
             "hashtags": hashtags[:10] if hashtags else ["#viral", "#trending", "#video"]
         }
     
-    async def generate_clips(self, video: Any, scenes: List[Dict], settings: Dict) -> List[Dict]:
-        """Generate clips from video based on scenes"""
-        if not MOVIEPY_AVAILABLE:
+    async def generate_clips(self, video_path: Path, scenes: List[Dict], settings: Dict,
+                             highlights: Optional[List[Dict]] = None) -> List[Dict]:
+        """Generate clips from the best highlight windows, or from the longest scenes"""
+        selection = settings.get("clipSelection", "highlights")
+        if selection not in CLIP_SELECTIONS:
+            raise ValueError(f"Unknown clip selection: {selection}")
+        engine = settings.get("renderEngine", default_render_engine())
+        if engine not in RENDER_ENGINES:
+            raise ValueError(f"Unknown render engine: {engine}")
+        if engine == "ffmpeg" and not FFMPEG_AVAILABLE:
+            engine = "moviepy"
+        if engine == "moviepy" and not MOVIEPY_AVAILABLE:
             logger.warning("MoviePy not available - skipping clip generation")
             return []
         
         clips_data = []
-        num_clips = min(settings.get("numClips", 5), len(scenes))
         target_duration = settings.get("clipDuration", 30)
         platform = settings.get("platform", "youtube_short")
         
-        # Sort scenes by duration (prefer longer scenes)
-        scenes_sorted = sorted(scenes, key=lambda x: x["duration"], reverse=True)
+        if selection == "highlights" and highlights:
+            # Already ranked and clip-length
+            windows = [(h["start"], h["end"], h["score"]) for h in highlights]
+        else:
+            # Sort scenes by duration (prefer longer scenes)
+            scenes_sorted = sorted(scenes, key=lambda x: x["duration"], reverse=True)
+            windows = [
+                (scene["start"], min(scene["end"], scene["start"] + target_duration), 0.7 + (i * 0.05))  # Simulated score
+                for i, scene in enumerate(scenes_sorted)
+            ]
+        windows = windows[:settings.get("numClips", 5)]
         
-        for i, scene in enumerate(scenes_sorted[:num_clips]):
-            try:
-                # Calculate clip boundaries
-                start_time = scene["start"]
-                end_time = min(scene["end"], start_time + target_duration)
-                
-                # Extract clip
-                clip = video.subclip(start_time, end_time)
-                
-                # Apply platform-specific formatting
-                if platform in ["youtube_short", "tiktok", "instagram_reel"]:
-                    # Vertical format (9:16)
-                    clip = clip.resize(height=1920)
-                    clip = clip.crop(x_center=clip.w/2, width=1080)
-                
-                # Generate filename
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                clip_filename = f"clip_{timestamp}_{i+1}.mp4"
-                clip_path = self.clips_dir / clip_filename
-                
-                # Save clip
-                clip.write_videofile(
-                    str(clip_path),
-                    codec='libx264',
-                    audio_codec='aac',
-                    temp_audiofile='temp-audio.m4a',
-                    remove_temp=True,
-                    logger=None
+        # Unique per request so concurrent jobs never write the same files
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        job_token = uuid.uuid4().hex[:8]
+        
+        # Several platforms at once: every window is decoded once for all of them
+        platforms = list(dict.fromkeys(settings.get("platforms") or []))
+        if platforms:
+            return await self.export_clips(video_path, windows, platforms, engine, settings,
+                                           f"clip_{timestamp}_{job_token}")
+        
+        # ffmpeg path: probe keyframes once so clips can be stream-copied between them
+        probe = {}
+        if engine == "ffmpeg":
+            probe = await worker_pool.encode(probe_source, str(video_path))
+        
+        filenames = []
+        renders = []
+        for i, (start_time, end_time, _) in enumerate(windows):
+            clip_filename = f"clip_{timestamp}_{job_token}_{i+1}.mp4"
+            filenames.append(clip_filename)
+            if engine == "ffmpeg":
+                # ffmpeg does the work in its own process, waited on outside the worker threads
+                renders.append(worker_pool.encode(
+                    render_clip_ffmpeg,
+                    str(video_path),
+                    start_time,
+                    end_time,
+                    platform,
+                    str(self.clips_dir / clip_filename),
+                    threads=worker_pool.encoder_threads,
+                    probe=probe
+                ))
+            else:
+                renders.append(worker_pool.render(
+                    render_clip,
+                    str(video_path),
+                    start_time,
+                    end_time,
+                    platform,
+                    str(self.clips_dir / clip_filename),
+                    threads=worker_pool.encoder_threads
+                ))
+        
+        renders = self.pace_renders(renders, settings)
+        
+        # Thumbnails come straight from the source, one seek per clip, alongside the renders
+        thumbnails = worker_pool.run(
+            extract_thumbnails,
+            str(video_path),
+            [(start_time, end_time) for start_time, end_time, _ in windows],
+            [str(self.processed_dir / name.replace('.mp4', '_thumb')) for name in filenames],
+            vertical=platform in VERTICAL_PLATFORMS,
+            keyframes=probe.get("keyframes", [])
+        )
+        
+        # Render every clip in parallel, a failed clip doesn't take the others down
+        *rendered, thumbs = await asyncio.gather(*renders, thumbnails, return_exceptions=True)
+        if isinstance(thumbs, Exception):
+            logger.error(f"Error generating thumbnails: {str(thumbs)}")
+            thumbs = [{"thumbnail": None, "preview": None} for _ in windows]
+        
+        for i, (clip_filename, result, window, thumb) in enumerate(zip(filenames, rendered, windows, thumbs)):
+            if isinstance(result, Exception):
+                logger.error(f"Error generating clip {i}: {str(result)}")
+                for name in thumb.values():
+                    if name:
+                        (self.processed_dir / name).unlink(missing_ok=True)
+                continue
+            
+            clips_data.append({
+                "filename": clip_filename,
+                "duration": result["duration"],
+                "platform": platform,
+                "published": False,
+                "viral_score": round(window[2], 4),
+                "thumbnail": thumb["thumbnail"],
+                "thumbnail_preview": thumb["preview"]
+            })
+        
+        return clips_data
+    
+    def pace_renders(self, renders: List[Any], settings: Dict[str, Any]) -> List[Any]:
+        """In streaming mode, run the renders one at a time so only one decoder and encoder hold full-size frames"""
+        if settings.get("executionMode") != "streaming":
+            return renders
+        render_slot = asyncio.Semaphore(1)
+        
+        async def one_at_a_time(render):
+            async with render_slot:
+                return await render
+        
+        return [one_at_a_time(render) for render in renders]
+    
+    async def export_clips(self, video_path: Path, windows: List[tuple], platforms: List[str],
+                           engine: str, settings: Dict[str, Any], prefix: str) -> List[Dict]:
+        """Every window in every platform's format, one clip entry per window and platform
+        
+        With ffmpeg each window is decoded once and split into one encoder per
+        shape and bitrate rung (settings["exportRenditions"] rungs of the ladder).
+        MoviePy decodes per output, so it only renders the top rung of each shape.
+        """
+        renditions = int(settings.get("exportRenditions", 1))
+        if engine != "ffmpeg" and renditions > 1:
+            logger.warning("Bitrate ladders need ffmpeg - rendering the top rung only")
+            renditions = 1
+        targets = export_targets(platforms, renditions)
+        shapes = list(dict.fromkeys(target["shape"] for target in targets))
+        
+        async def render_window(start_time: float, end_time: float, paths: List[str]) -> List[Dict[str, Any]]:
+            # A coroutine, not a bare gather, so nothing starts until pace_renders awaits it
+            return await asyncio.gather(*[
+                worker_pool.render(
+                    render_clip, str(video_path), start_time, end_time, target["platforms"][0], path,
+                    threads=worker_pool.encoder_threads
                 )
-                
-                # Generate thumbnail
-                thumbnail_path = self.generate_thumbnail(clip, clip_filename)
-                
+                for target, path in zip(targets, paths)
+            ])
+        
+        outputs = []
+        renders = []
+        for i, (start_time, end_time, _) in enumerate(windows):
+            names = [f"{prefix}_{i+1}_{target['shape']}_{target['height']}.mp4" for target in targets]
+            paths = [str(self.clips_dir / name) for name in names]
+            outputs.append(names)
+            if engine == "ffmpeg":
+                renders.append(worker_pool.encode(
+                    render_clip_targets,
+                    str(video_path),
+                    start_time,
+                    end_time,
+                    targets,
+                    paths,
+                    threads=worker_pool.encoder_threads
+                ))
+            else:
+                renders.append(render_window(start_time, end_time, paths))
+        renders = self.pace_renders(renders, settings)
+        
+        # One thumbnail pass per shape, cropped and sized like that shape's top rung
+        thumbnails = [
+            worker_pool.run(
+                extract_thumbnails,
+                str(video_path),
+                [(start_time, end_time) for start_time, end_time, _ in windows],
+                [str(self.processed_dir / f"{prefix}_{i+1}_{shape}_thumb") for i in range(len(windows))],
+                vertical=shape == "vertical",
+                height=max(target["height"] for target in targets if target["shape"] == shape)
+            )
+            for shape in shapes
+        ]
+        
+        # Renders and thumbnail passes all at once, a failed clip doesn't take the others down
+        results = await asyncio.gather(*renders, *thumbnails, return_exceptions=True)
+        rendered = results[:len(renders)]
+        thumbs = {}
+        for shape, result in zip(shapes, results[len(renders):]):
+            if isinstance(result, Exception):
+                logger.error(f"Error generating {shape} thumbnails: {str(result)}")
+                result = [{"thumbnail": None, "preview": None} for _ in windows]
+            thumbs[shape] = result
+        
+        clips_data = []
+        for i, (names, result, window) in enumerate(zip(outputs, rendered, windows)):
+            if isinstance(result, Exception):
+                logger.error(f"Error exporting clip {i}: {str(result)}")
+                for name in names:
+                    (self.clips_dir / name).unlink(missing_ok=True)
+                for shape in shapes:
+                    for name in thumbs[shape][i].values():
+                        if name:
+                            (self.processed_dir / name).unlink(missing_ok=True)
+                continue
+            duration = result[0]["duration"] if isinstance(result, list) else result["duration"]
+            
+            for platform in platforms:
+                # Best rung first, that file is the platform's clip
+                own = [n for n, target in enumerate(targets) if platform in target["platforms"]]
+                thumb = thumbs[targets[own[0]]["shape"]][i]
                 clips_data.append({
-                    "filename": clip_filename,
-                    "duration": clip.duration,
+                    "filename": names[own[0]],
+                    "duration": duration,
                     "platform": platform,
                     "published": False,
-                    "viral_score": 0.7 + (i * 0.05),  # Simulated score
-                    "thumbnail": thumbnail_path
+                    "viral_score": round(window[2], 4),
+                    "thumbnail": thumb["thumbnail"],
+                    "thumbnail_preview": thumb["preview"],
+                    "clip_index": i,
+                    "renditions": [
+                        {"filename": names[n], "height": targets[n]["height"], "bitrate_kbps": targets[n]["bitrate_kbps"]}
+                        for n in own
+                    ]
                 })
-                
-            except Exception as e:
-                logger.error(f"Error generating clip {i}: {str(e)}")
-                continue
         
         return clips_data
+
+processor: Optional[VideoProcessor] = None
+job_manager: Optional[JobManager] = None
+
+def init_engine() -> None:
+    """Preload models, open the processor's data tree and stores, and set up the job queue"""
+    global processor, job_manager
+    if PRELOAD_MODELS:
+        models.preload()
     
-    def generate_thumbnail(self, clip: Any, filename: str) -> str:
-        """Generate thumbnail from clip"""
-        try:
-            # Get frame at 1/3 of the clip duration
-            frame_time = clip.duration / 3
-            frame = clip.get_frame(frame_time)
-            
-            # Convert to image
-            import PIL.Image
-            image = PIL.Image.fromarray(frame)
-            
-            # Save thumbnail
-            thumb_filename = filename.replace('.mp4', '_thumb.jpg')
-            thumb_path = self.processed_dir / thumb_filename
-            image.save(str(thumb_path), 'JPEG', quality=85)
-            
-            return thumb_filename
-        except Exception as e:
-            logger.error(f"Error generating thumbnail: {str(e)}")
-            return None
+    processor = VideoProcessor()
+    
+    # Job queue: Celery on Redis when configured and installed, in-process workers otherwise
+    job_manager = JobManager(JobStore(processor.processed_dir.parent / "jobs.db"), processor.process_video)
+    if JOB_BACKEND == "celery" and CELERY_AVAILABLE:
+        job_manager.backend = CeleryJobBackend(job_manager, celery_app)
+    else:
+        if JOB_BACKEND == "celery":
+            logger.warning("Celery not available - using in-process job workers")
+        job_manager.backend = LocalJobBackend(job_manager)
+
+# Only where the module is imported to serve: uvicorn main:app, gunicorn --preload, celery -A main.
+# `python main.py` runs it as __main__ just to start uvicorn, which imports it again, and the
+# spawned render and transcription processes re-run it as __mp_main__ only to find their functions.
+if __name__ not in ("__main__", "__mp_main__"):
+    init_engine()
 
-# Initialize processor
-processor = VideoProcessor()
+# Read at scrape time
+registry.gauge("manifest_requests_in_flight", "Requests holding a worker pool slot",
+               function=lambda: worker_pool.in_flight)
+registry.gauge("manifest_worker_pool_capacity", "Worker slots plus queue slots",
+               function=lambda: worker_pool.capacity)
+registry.gauge("manifest_memory_reserved_bytes", "Memory reserved by admitted jobs",
+               function=lambda: memory_budget.reserved_mb * 1024 * 1024)
+registry.gauge("manifest_memory_budget_bytes", "Memory this node admits jobs up to",
+               function=lambda: memory_budget.total_mb * 1024 * 1024)
+# Job counts as of the backend's last sweep, a scrape never waits on the job store
+registry.gauge("manifest_job_queue_depth", "Jobs waiting to be picked up",
+               function=lambda: job_manager.counts["queued"])
+registry.gauge("manifest_jobs_running", "Jobs currently being processed",
+               function=lambda: job_manager.counts["running"])
 
 # API Routes
 @app.get("/")
-async def root():
+def root():
     return {
         "name": "Manifest Engine AI",
         "version": "1.3.0",
         "status": "operational",
         "device": device,
         "models": {
-            "whisper": "available" if whisper_model else "not available",
-            "sentiment": "available" if sentiment_analyzer else "not available",
-            "moviepy": "available" if MOVIEPY_AVAILABLE else "not available"
-        }
+            "whisper": "available" if models.available("whisper") else "not available",
+            "sentiment": "available" if models.available("sentiment") else "not available",
+            "moviepy": "available" if MOVIEPY_AVAILABLE else "not available",
+            "ffmpeg": "available" if FFMPEG_AVAILABLE else "not available"
+        },
+        "model_registry": models.status(),
+        "workers": worker_pool.status(),
+        "cache": processor.cache.status(),
+        "jobs": job_manager.status(),
+        "memory": memory_budget.status(),
+        "single_flight": processor.single_flight.status(),
+        "analysis_store": processor.analysis_store.status()
     }
 
 @app.get("/health")
@@ -488,77 +1059,195 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics, served off the event loop so scrapes don't wait on processing"""
+    return Response(content=registry.render(), media_type=registry.content_type)
+
 @app.post("/process")
-async def process_video(request: VideoProcessRequest, background_tasks: BackgroundTasks):
-    """Process video with AI"""
+async def process_video(request: VideoProcessRequest, background_tasks: BackgroundTasks, profile: bool = False):
+    """Process video with AI, ?profile=true adds a per-stage breakdown to the response"""
     try:
-        # Check cache first if Redis available
-        if REDIS_AVAILABLE and redis_client:
-            try:
-                cached = redis_client.get(f"video_analysis:{request.videoId}")
-                if cached:
-                    return JSONResponse(content=json.loads(cached))
-            except:
-                pass
-        
-        # Process video
-        analysis = await processor.process_video(
-            request.videoId,
-            request.filename,
-            request.settings
-        )
+        settings = dict(request.settings, profile=True) if profile else request.settings
+        # Process video (cached results are returned by the processor)
+        with worker_pool.reserve():
+            analysis = await processor.process_video(
+                request.videoId,
+                request.filename,
+                settings
+            )
         
         return analysis
         
+    except WorkerPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/transcribe")
-async def transcribe_video(file: UploadFile = File(...)):
+@app.post("/process/batch")
+async def process_batch(request: BatchProcessRequest):
+    """Process many videos in one request, streaming an NDJSON line per video as it finishes"""
+    if not request.videos:
+        raise HTTPException(status_code=400, detail="No videos to process")
+    if len(request.videos) > BATCH_MAX_VIDEOS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_VIDEOS} videos")
+    
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, worker_pool.max_workers)
+    # Load models while the first videos are being probed, every video in the batch shares them
+    if not all(models.loaded(name) for name in ("whisper", "sentiment") if models.available(name)):
+        models.prewarm()
+    
+    async def process_one(video: VideoProcessRequest) -> Dict[str, Any]:
+        # Waits for a free worker slot rather than failing the video with a 503
+        async with worker_pool.admit():
+            analysis = await processor.process_video(video.videoId, video.filename, video.settings)
+        return analysis.model_dump()
+    
+    async def results():
+        started = time.perf_counter()
+        counts = {"completed": 0, "failed": 0}
+        async for outcome in run_batch(request.videos, process_one, concurrency):
+            counts[outcome["status"]] += 1
+            yield ndjson({"videoId": request.videos[outcome["index"]].videoId, **outcome})
+        yield ndjson(dict(counts, done=True, seconds=round(time.perf_counter() - started, 2)))
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# The job routes are sync so their store calls run on FastAPI's threadpool, not on the
+# worker pool, where they would queue behind renders and transcription
+@app.post("/jobs", status_code=202)
+def submit_job(request: VideoProcessRequest):
+    """Queue a video for processing and return its job ID immediately"""
+    job = job_manager.submit(request.videoId, request.filename, request.settings)
+    return {"jobId": job["id"], "status": job["status"]}
+
+@app.get("/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent jobs, newest first"""
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
+    return job_manager.store.list(status, min(limit, 500))
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Job status with per-stage progress, and the analysis once completed"""
+    job = job_manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one at its next stage"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/retry")
+def retry_job(job_id: str):
+    """Requeue a failed or cancelled job, stages that already finished come from the cache"""
+    job = job_manager.retry(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/keywords/{video_id}")
+async def live_keywords(video_id: str):
+    """Keywords and hashtags of a video while it is still being processed"""
+    text_index = processor.live_text.get(video_id)
+    if text_index is None:
+        raise HTTPException(status_code=404, detail="Video is not being processed")
+    return {
+        "videoId": video_id,
+        "words": len(text_index),
+        "keywords": text_index.keywords(),
+        "hashtags": text_index.hashtags()
+    }
+
+@app.get("/videos/{video_id}/analysis")
+def stored_analysis(video_id: str):
+    """Stored analysis of a processed video: transcript, keywords, titles and what else is indexed"""
+    summary = processor.analysis_store.summary(video_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Video has not been analyzed")
+    return summary
+
+@app.get("/videos/{video_id}/scenes")
+def stored_scenes(video_id: str, start: Optional[float] = None, end: Optional[float] = None, q: Optional[str] = None):
+    """Scenes overlapping [start, end), ?q= keeps those whose transcript mentions every word of q"""
+    if not processor.analysis_store.has(video_id):
+        raise HTTPException(status_code=404, detail="Video has not been analyzed")
+    return {"videoId": video_id, "scenes": processor.analysis_store.scenes(video_id, start, end, q)}
+
+@app.get("/videos/{video_id}/segments")
+def stored_segments(video_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                    q: Optional[str] = None, limit: int = 500):
+    """Timestamped transcript segments in a time range and/or matching q"""
+    if not processor.analysis_store.has(video_id):
+        raise HTTPException(status_code=404, detail="Video has not been analyzed")
+    return {"videoId": video_id, "segments": processor.analysis_store.segments(video_id, start, end, q, limit)}
+
+@app.get("/videos/{video_id}/features/{name}")
+def stored_feature(video_id: str, name: str, start: Optional[float] = None, end: Optional[float] = None):
+    """A per-second feature (motion, audio_rms, audio_peaks), one value per second from start"""
+    values = processor.analysis_store.feature(video_id, name, start, end)
+    if values is None:
+        raise HTTPException(status_code=404, detail=f"No {name} feature stored for this video")
+    return {"videoId": video_id, "name": name, "start": max(0, int(start or 0)), "values": values}
+
+@app.get("/search")
+def search_segments(q: str, limit: int = 100):
+    """Transcript segments of every analyzed video that mention every word of q"""
+    return {"query": q, "segments": processor.analysis_store.segments(text=q, limit=limit)}
+
+@app.post("/transcribe", openapi_extra=UPLOAD_OPENAPI)
+async def transcribe_video(request: Request):
     """Transcribe video audio"""
-    if not whisper_model:
+    if not models.available("whisper"):
         return {"error": "Transcription not available - Whisper not installed"}
     
     try:
-        # Save uploaded file temporarily
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            temp_path = Path(tmp.name)
-        
-        # Transcribe
-        transcript = await processor.transcribe_audio(temp_path)
+        # Streamed from the body to a temp file, size-capped as it arrives, removed however the request ends
+        async with saved_upload(request) as temp_path:
+            with worker_pool.reserve():
+                transcription = await processor.transcribe_audio(temp_path)
         
-        # Clean up
-        temp_path.unlink()
-        
-        return {"transcript": transcript}
+        return {
+            "transcript": transcription.get("text", ""),
+            "segments": transcription.get("segments", [])
+        }
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except WorkerPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/analyze-viral")
-async def analyze_viral(file: UploadFile = File(...)):
+@app.post("/analyze-viral", openapi_extra=UPLOAD_OPENAPI)
+async def analyze_viral(request: Request):
     """Analyze video for viral potential"""
     try:
-        # Save uploaded file temporarily
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            temp_path = Path(tmp.name)
-        
-        # Analyze
-        analysis = await processor.analyze_viral_potential(temp_path, None)
-        
-        # Clean up
-        temp_path.unlink()
+        # Streamed from the body to a temp file, size-capped as it arrives, removed however the request ends
+        async with saved_upload(request) as temp_path:
+            with worker_pool.reserve():
+                analysis = await processor.analyze_viral_potential(temp_path, None)
         
         return analysis
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except WorkerPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -579,6 +1268,7 @@ if __name__ == "__main__":
        
        Components:
        - MoviePy: {}
+       - ffmpeg: {}
        - Whisper: {}
        - Sentiment: {}
        - Redis: {}
@@ -587,14 +1277,15 @@ if __name__ == "__main__":
     """.format(
         device,
         "✓" if MOVIEPY_AVAILABLE else "✗",
-        "✓" if whisper_model else "✗",
-        "✓" if sentiment_analyzer else "✗",
+        "✓" if FFMPEG_AVAILABLE else "✗",
+        "✓" if models.available("whisper") else "✗",
+        "✓" if models.available("sentiment") else "✗",
         "✓" if REDIS_AVAILABLE else "✗"
     ))
     
-    # Run server
+    # Run server (reload and workers need the import string, not the app object)
     uvicorn.run(
-        app,
+        "main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
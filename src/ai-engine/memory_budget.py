@@ -0,0 +1,146 @@
+"""
+Manifest Engine v1.3 - Memory Budget
+Per-job memory estimates, the streaming execution mode for large inputs, and node-wide admission.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from frame_source import VideoMetadata
+from transcription import SAMPLE_RATE, CHUNK_SECONDS, TRANSCRIBE_PROCESSES
+from workers import RENDER_PROCESSES
+from render import VERTICAL_PLATFORMS, export_targets
+
+logger = logging.getLogger(__name__)
+
+# Everything admitted jobs may hold at once on this node
+NODE_MEMORY_MB = int(os.environ.get("MANIFEST_MEMORY_BUDGET_MB", 4096))
+# Jobs estimated above this run in streaming mode, overridable per request with memoryBudgetMb
+JOB_MEMORY_MB = int(os.environ.get("MANIFEST_JOB_MEMORY_MB", 1024))
+# How long a job waits for budget before it is refused
+MEMORY_WAIT_SECONDS = float(os.environ.get("MANIFEST_MEMORY_WAIT_SECONDS", 300))
+
+# "standard" favours speed, "streaming" bounds memory, "auto" streams jobs over their budget
+EXECUTION_MODES = ("auto", "standard", "streaming")
+
+MB = 1024 * 1024
+JOB_BASE_MB = 64         # results, thumbnails and interpreter overhead per job
+DECODE_FRAMES = 4        # frames alive during analysis when every sample is a new array
+STREAMING_DECODE_FRAMES = 2  # the decoder's own frame plus the one reused buffer
+RENDER_FRAMES = 8        # decoded and scaled frames an encoder keeps in flight
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a job can't get its memory reservation on this node"""
+
+
+@dataclass
+class JobPlan:
+    """How a job will run and the memory reserved for it"""
+    streaming: bool
+    memory_mb: float
+
+    @property
+    def mode(self) -> str:
+        return "streaming" if self.streaming else "standard"
+
+
+def estimate_job_mb(metadata: Optional[VideoMetadata], settings: Dict[str, Any], streaming: bool) -> float:
+    """Rough peak memory of one job, dominated by full-size frames and whole-track audio"""
+    if metadata is None:
+        return float(JOB_BASE_MB)
+    frame_mb = metadata.width * metadata.height * 3 / MB
+    # Vertical renders scale the source to 1920 high before cropping
+    if settings.get("platform", "youtube_short") in VERTICAL_PLATFORMS and metadata.height > 0:
+        render_frame_mb = frame_mb + metadata.width * 1920 / metadata.height * 1920 * 3 / MB
+    else:
+        render_frame_mb = frame_mb * 2
+
+    if streaming:
+        decode_mb = frame_mb * STREAMING_DECODE_FRAMES
+        # Chunked transcription keeps two chunks per worker in flight
+        audio_mb = TRANSCRIBE_PROCESSES * 2 * CHUNK_SECONDS * SAMPLE_RATE * 4 / MB
+        renders = 1
+    else:
+        decode_mb = frame_mb * DECODE_FRAMES
+        # Whisper decodes the whole track, then builds its features from a copy
+        audio_mb = metadata.duration * SAMPLE_RATE * 4 * 2 / MB
+        renders = min(max(1, int(settings.get("numClips", 5))), RENDER_PROCESSES)
+
+    render_mb = 0.0
+    if settings.get("generateClips", True):
+        outputs = 1
+        if settings.get("platforms"):
+            # A multi-platform export runs one encoder per output off each decode
+            outputs = len(export_targets(settings["platforms"], int(settings.get("exportRenditions", 1))))
+        render_mb = renders * render_frame_mb * RENDER_FRAMES * outputs
+    return round(JOB_BASE_MB + decode_mb + audio_mb + render_mb, 1)
+
+
+def plan_job(metadata: Optional[VideoMetadata], settings: Dict[str, Any]) -> JobPlan:
+    """Pick standard or streaming execution from settings["executionMode"] and the job's budget"""
+    mode = settings.get("executionMode", "auto")
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode: {mode}")
+
+    if mode == "auto":
+        budget = float(settings.get("memoryBudgetMb") or JOB_MEMORY_MB)
+        standard_mb = estimate_job_mb(metadata, settings, streaming=False)
+        if standard_mb <= budget:
+            return JobPlan(streaming=False, memory_mb=standard_mb)
+        logger.info(f"Estimated {standard_mb:g} MB exceeds the {budget:g} MB job budget, streaming")
+        mode = "streaming"
+
+    streaming = mode == "streaming"
+    return JobPlan(streaming=streaming, memory_mb=estimate_job_mb(metadata, settings, streaming))
+
+
+class MemoryBudget:
+    """Node-wide memory reservations, so concurrent large jobs queue instead of running out of memory"""
+
+    def __init__(self, total_mb: float = NODE_MEMORY_MB, wait_seconds: float = MEMORY_WAIT_SECONDS):
+        self.total_mb = float(total_mb)
+        self.wait_seconds = wait_seconds
+        self.reserved_mb = 0.0
+        self.waiting = 0
+
+    def fits(self, memory_mb: float) -> bool:
+        return self.reserved_mb + memory_mb <= self.total_mb
+
+    async def acquire(self, memory_mb: float, poll_interval: float = 0.2) -> float:
+        """Reserve memory_mb, waiting up to wait_seconds for running jobs to release theirs
+
+        A job bigger than the whole budget is refused straight away. Returns
+        the amount reserved, to hand back to release.
+        """
+        if memory_mb > self.total_mb:
+            raise MemoryBudgetExceeded(
+                f"Job needs about {memory_mb:g} MB, more than this node's {self.total_mb:g} MB budget"
+            )
+        deadline = time.monotonic() + self.wait_seconds
+        self.waiting += 1
+        try:
+            while not self.fits(memory_mb):
+                if time.monotonic() >= deadline:
+                    raise MemoryBudgetExceeded(
+                        f"Memory budget is full ({self.reserved_mb:g}/{self.total_mb:g} MB reserved)"
+                    )
+                await asyncio.sleep(poll_interval)
+        finally:
+            self.waiting -= 1
+        self.reserved_mb += memory_mb
+        return memory_mb
+
+    def release(self, memory_mb: float) -> None:
+        self.reserved_mb = max(0.0, self.reserved_mb - memory_mb)
+
+    def status(self) -> Dict[str, float]:
+        return {
+            "budget_mb": self.total_mb,
+            "reserved_mb": round(self.reserved_mb, 1),
+            "waiting": self.waiting
+        }
@@ -0,0 +1,241 @@
+"""
+Manifest Engine v1.3 - Metrics
+Prometheus text-format counters, gauges and histograms, and tracing hooks around pipeline work.
+"""
+
+import time
+import functools
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+    tracer = otel_trace.get_tracer("manifest-engine")
+except ImportError:
+    OTEL_AVAILABLE = False
+    tracer = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]).replace('"', "'") for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        if not self.labels:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """Set explicitly, or read from function at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            try:
+                return [f"{self.name} {format_value(self.function())}"]
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} failed: {str(e)}")
+                return []
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in values]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = format_labels(self.labels, key, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric the engine exports, rendered together for /metrics"""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "manifest_stage_duration_seconds", "Wall-clock seconds per pipeline stage", ("stage", "status")
+)
+VIDEOS_PROCESSED = registry.counter(
+    "manifest_videos_processed_total", "Videos through process_video by outcome", ("status",)
+)
+FRAMES_GRABBED = registry.counter("manifest_frames_grabbed_total", "Frames read from video containers")
+FRAMES_DECODED = registry.counter("manifest_frames_decoded_total", "Frames decoded to pixels for analysis")
+BYTES_READ = registry.counter(
+    "manifest_bytes_read_total", "Bytes of media read, by what read them", ("source",)
+)
+CACHE_REQUESTS = registry.counter(
+    "manifest_cache_requests_total", "Result cache lookups by tier and outcome", ("tier", "result")
+)
+INFERENCE_SECONDS = registry.histogram(
+    "manifest_model_inference_seconds", "Latency of model calls", ("model",)
+)
+INFERENCE_BATCH_SIZE = registry.histogram(
+    "manifest_model_batch_size", "Inputs per batched model call", ("model",), BATCH_BUCKETS
+)
+
+# Called with (name, seconds, status, attributes) after every span, e.g. to forward to a tracer
+TRACE_HOOKS: List[Callable[[str, float, str, Dict[str, Any]], None]] = []
+
+
+def add_trace_hook(hook: Callable[[str, float, str, Dict[str, Any]], None]) -> None:
+    TRACE_HOOKS.append(hook)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """An OpenTelemetry span when it is installed, reported to the trace hooks either way"""
+    started = time.perf_counter()
+    status = "error"
+    context = tracer.start_as_current_span(name, attributes=attributes) if OTEL_AVAILABLE else nullcontext()
+    with context:
+        try:
+            yield
+            status = "ok"
+        finally:
+            elapsed = time.perf_counter() - started
+            for hook in TRACE_HOOKS:
+                try:
+                    hook(name, elapsed, status, attributes)
+                except Exception as e:
+                    logger.debug(f"Trace hook failed: {str(e)}")
+
+
+def traced(name: str):
+    """Run an async function inside span(name)"""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,106 @@
+"""
+Manifest Engine v1.3 - Model Registry
+Load AI models on first use, prewarm them in the background, report their state.
+"""
+
+import gc
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Load every model at import, before a preforking server (gunicorn --preload) forks its workers
+PRELOAD_MODELS = os.environ.get("MANIFEST_PRELOAD_MODELS", "0") == "1"
+# Load every model on a background thread once the app starts
+PREWARM_MODELS = os.environ.get("MANIFEST_PREWARM_MODELS", "0") == "1"
+
+
+def model_memory_bytes(model: Any) -> Optional[int]:
+    """Size of a torch model's parameters and buffers, None for anything else"""
+    if hasattr(model, "model") and not hasattr(model, "parameters"):
+        # transformers pipelines wrap the actual module
+        model = model.model
+    if not hasattr(model, "parameters"):
+        return None
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Named model loaders, each run at most once and only when the model is needed"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+        self._state[name] = {"state": "unloaded"}
+
+    def available(self, name: str) -> bool:
+        """Registered and not known to be broken, loading it may still be pending"""
+        return name in self._loaders and self._state[name]["state"] != "failed"
+
+    def loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Optional[Any]:
+        """The loaded model, loading it now if needed; None if unavailable. Blocking."""
+        if name in self._models:
+            return self._models[name]
+        if not self.available(name):
+            return None
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if self._state[name]["state"] == "failed":
+                return None
+
+            self._state[name] = {"state": "loading"}
+            logger.info(f"Loading model: {name}")
+            started = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                print(f"Warning: Could not load {name} model")
+                logger.error(f"Model {name} failed to load: {str(e)}")
+                self._state[name] = {"state": "failed", "error": str(e)}
+                return None
+
+            memory = model_memory_bytes(model)
+            self._state[name] = {
+                "state": "loaded",
+                "load_seconds": round(time.perf_counter() - started, 2),
+                "memory_mb": round(memory / (1024 * 1024), 1) if memory is not None else None
+            }
+            self._models[name] = model
+            return model
+
+    def load_all(self, names: Optional[Iterable[str]] = None) -> None:
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def preload(self) -> None:
+        """Load everything now and freeze the heap so forked workers keep sharing the pages"""
+        self.load_all()
+        gc.collect()
+        gc.freeze()
+
+    def prewarm(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """Load models in the background so the first request doesn't pay for it"""
+        thread = threading.Thread(target=self.load_all, args=(names,), name="model-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(state) for name, state in self._state.items()}
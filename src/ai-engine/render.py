@@ -0,0 +1,338 @@
+"""
+Manifest Engine v1.3 - Clip Rendering
+Module-level render functions so clips can be encoded in separate processes.
+"""
+
+import json
+import bisect
+import shutil
+import logging
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+
+try:
+    from moviepy.editor import VideoFileClip
+    MOVIEPY_AVAILABLE = True
+except ImportError:
+    MOVIEPY_AVAILABLE = False
+    VideoFileClip = None
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BIN = shutil.which("ffmpeg")
+FFPROBE_BIN = shutil.which("ffprobe")
+FFMPEG_AVAILABLE = FFMPEG_BIN is not None
+
+RENDER_ENGINES = ("ffmpeg", "moviepy")
+
+VERTICAL_PLATFORMS = ("youtube_short", "tiktok", "instagram_reel")
+
+# Same 9:16 framing as the MoviePy resize(height=1920) + centre crop, done inside ffmpeg
+VERTICAL_FILTER = "scale=-2:1920,crop='min(iw,1080)':1920"
+
+# Multi-target export: (output height, video kbps) rungs per output shape, best first.
+# Landscape never upscales, so a 720p source tops out at 720p.
+BITRATE_LADDERS = {
+    "vertical": ((1920, 6000), (1280, 3000), (854, 1500)),
+    "landscape": ((1080, 5000), (720, 2500), (480, 1200))
+}
+
+# Clip edges closer than this to a keyframe count as aligned
+KEYFRAME_TOLERANCE = 0.02
+
+# Stream copy can only be spliced with libx264 edges when the source matches them
+SMART_CUT_VIDEO_CODECS = ("h264",)
+
+
+def default_render_engine() -> str:
+    return "ffmpeg" if FFMPEG_AVAILABLE else "moviepy"
+
+
+def render_clip(video_path: str, start_time: float, end_time: float, platform: str,
+                clip_path: str, threads: int = 1) -> Dict[str, Any]:
+    """Cut, format and encode one clip
+
+    Runs inside a render worker process, so it opens its own reader on the
+    source and only exchanges plain values with the caller.
+    """
+    if not MOVIEPY_AVAILABLE:
+        raise RuntimeError("MoviePy not available in render worker")
+
+    clip_path = Path(clip_path)
+    video = VideoFileClip(video_path)
+    try:
+        # Extract clip
+        clip = video.subclip(start_time, end_time)
+
+        # Apply platform-specific formatting
+        if platform in VERTICAL_PLATFORMS:
+            # Vertical format (9:16)
+            clip = clip.resize(height=1920)
+            clip = clip.crop(x_center=clip.w/2, width=1080)
+
+        # Save clip, with a temp audio file of its own so parallel renders don't collide
+        clip.write_videofile(
+            str(clip_path),
+            codec='libx264',
+            audio_codec='aac',
+            temp_audiofile=str(clip_path.with_name(f"{clip_path.stem}_temp-audio.m4a")),
+            remove_temp=True,
+            threads=threads,
+            logger=None
+        )
+
+        return {"duration": clip.duration}
+    finally:
+        video.close()
+
+
+def run_ffmpeg(args: List[str]) -> None:
+    """Run ffmpeg quietly, raising with its error output on failure"""
+    if not FFMPEG_AVAILABLE:
+        raise RuntimeError("ffmpeg not available")
+    result = subprocess.run(
+        [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y", *args],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
+
+
+def probe_source(video_path: str) -> Dict[str, Any]:
+    """Read codecs, frame rate and keyframe times from packet flags, without decoding anything"""
+    probe = {"video_codec": None, "audio_codec": None, "pix_fmt": None, "fps": None, "duration": None,
+             "keyframes": [], "keyframe_frames": []}
+    if not FFPROBE_BIN:
+        return probe
+
+    try:
+        result = subprocess.run(
+            [FFPROBE_BIN, "-v", "error",
+             "-show_entries", "format=start_time:stream=codec_type,codec_name,pix_fmt",
+             "-of", "json", video_path],
+            capture_output=True, text=True, check=True
+        )
+        info = json.loads(result.stdout)
+        for stream in info.get("streams", []):
+            if stream.get("codec_type") == "video" and probe["video_codec"] is None:
+                probe["video_codec"] = stream.get("codec_name")
+                probe["pix_fmt"] = stream.get("pix_fmt")
+            elif stream.get("codec_type") == "audio" and probe["audio_codec"] is None:
+                probe["audio_codec"] = stream.get("codec_name")
+        start = float(info.get("format", {}).get("start_time", 0) or 0)
+
+        result = subprocess.run(
+            [FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+            capture_output=True, text=True, check=True
+        )
+        times, keyframes = [], []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if pts_time in ("", "N/A"):
+                continue
+            times.append(float(pts_time) - start)
+            if "K" in flags:
+                keyframes.append(times[-1])
+        times.sort()
+        probe["keyframes"] = sorted(keyframes)
+        # Each keyframe's frame number in presentation order, so a copy can be bounded by frame count
+        probe["keyframe_frames"] = [bisect.bisect_left(times, k) for k in probe["keyframes"]]
+        if len(times) > 1 and times[-1] > times[0]:
+            probe["fps"] = (len(times) - 1) / (times[-1] - times[0])
+            # The video track ends one frame after its last frame starts
+            probe["duration"] = times[-1] + 1 / probe["fps"]
+    except Exception as e:
+        logger.warning(f"Could not probe {video_path}: {str(e)}")
+
+    return probe
+
+
+def render_clip_ffmpeg(video_path: str, start_time: float, end_time: float, platform: str,
+                       clip_path: str, threads: int = 1,
+                       probe: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Cut one clip with ffmpeg, stream-copying whatever doesn't need a re-encode"""
+    clip_path = Path(clip_path)
+    probe = probe or {}
+    # A window past the end of the source would fail the smart cut's frame check
+    if probe.get("duration"):
+        end_time = min(end_time, probe["duration"])
+    duration = end_time - start_time
+
+    if platform in VERTICAL_PLATFORMS:
+        encode_segment(video_path, start_time, duration, clip_path, threads, VERTICAL_FILTER)
+    else:
+        cut_segment(video_path, start_time, end_time, clip_path, threads, probe)
+
+    return {"duration": clip_seconds(clip_path, duration)}
+
+
+def export_targets(platforms: List[str], renditions: int = 1) -> List[Dict[str, Any]]:
+    """One output per shape and ladder rung, listing the platforms it serves
+
+    Platforms with the same shape (TikTok and YouTube Shorts, say) share
+    their outputs instead of encoding identical files twice.
+    """
+    targets: Dict[Any, Dict[str, Any]] = {}
+    for platform in platforms:
+        shape = "vertical" if platform in VERTICAL_PLATFORMS else "landscape"
+        for height, kbps in BITRATE_LADDERS[shape][:max(1, renditions)]:
+            target = targets.setdefault((shape, height), {
+                "shape": shape, "height": height, "bitrate_kbps": kbps, "platforms": []
+            })
+            if platform not in target["platforms"]:
+                target["platforms"].append(platform)
+    return list(targets.values())
+
+
+def target_filter(target: Dict[str, Any]) -> str:
+    height = target["height"]
+    if target["shape"] == "vertical":
+        width = height * 9 // 16 // 2 * 2
+        return f"scale=-2:{height},crop='min(iw,{width})':{height}"
+    return f"scale=-2:'min(ih,{height})'"
+
+
+def render_clip_targets(video_path: str, start_time: float, end_time: float,
+                        targets: List[Dict[str, Any]], clip_paths: List[str],
+                        threads: int = 1) -> Dict[str, Any]:
+    """Decode the window once and encode every target from it
+
+    One ffmpeg run: a split filter hands the decoded frames to one scale/crop
+    chain and encoder per target, so N outputs cost one decode plus N encodes.
+    """
+    duration = end_time - start_time
+    branches = "".join(f"[s{i}]" for i in range(len(targets)))
+    graph = [f"[0:v]split={len(targets)}{branches}"]
+    graph += [f"[s{i}]{target_filter(target)}[o{i}]" for i, target in enumerate(targets)]
+
+    # -t before -i bounds the input, so it applies to every output
+    args = ["-ss", f"{start_time:.3f}", "-t", f"{duration:.3f}", "-i", video_path,
+            "-filter_complex", ";".join(graph)]
+    for i, (target, clip_path) in enumerate(zip(targets, clip_paths)):
+        kbps = target["bitrate_kbps"]
+        args += ["-map", f"[o{i}]", "-map", "0:a?",
+                 "-c:v", "libx264", "-threads", str(threads),
+                 "-b:v", f"{kbps}k", "-maxrate", f"{kbps * 3 // 2}k", "-bufsize", f"{kbps * 2}k",
+                 "-c:a", "aac", "-movflags", "+faststart", str(clip_path)]
+    run_ffmpeg(args)
+    return {"duration": clip_seconds(clip_paths[0], duration)}
+
+
+def encode_segment(video_path: str, start: float, duration: float, out_path: Path,
+                   threads: int = 1, video_filter: Optional[str] = None,
+                   pix_fmt: Optional[str] = None, audio: bool = True) -> None:
+    """Frame-accurate re-encode of [start, start + duration)"""
+    args = ["-ss", f"{start:.3f}", "-i", video_path, "-t", f"{duration:.3f}"]
+    if video_filter:
+        args += ["-vf", video_filter]
+    if pix_fmt:
+        args += ["-pix_fmt", pix_fmt]
+    args += ["-c:v", "libx264", "-threads", str(threads)]
+    args += ["-c:a", "aac"] if audio else ["-an"]
+    args += ["-movflags", "+faststart", str(out_path)]
+    run_ffmpeg(args)
+
+
+def copy_segment(video_path: str, start: float, frames: int, out_path: Path) -> None:
+    """Stream copy of the video track only, frames frames from the keyframe at start
+
+    Bounded by frame count rather than -t: a copy stops on a packet boundary in
+    decode order, and with B-frames -t lets it run past the next keyframe.
+    """
+    # Just past the keyframe, so rounding can't seek back to the one before it
+    run_ffmpeg(["-ss", f"{start + KEYFRAME_TOLERANCE / 2:.3f}", "-i", video_path,
+                "-map", "0:v:0", "-frames:v", str(frames), "-c", "copy",
+                "-avoid_negative_ts", "make_zero", str(out_path)])
+
+
+def encode_audio(video_path: str, start: float, duration: float, out_path: Path) -> None:
+    run_ffmpeg(["-ss", f"{start:.3f}", "-i", video_path, "-t", f"{duration:.3f}",
+                "-vn", "-c:a", "aac", str(out_path)])
+
+
+def frame_count(clip_path: Path) -> Tuple[int, float]:
+    """Frames and frame rate from the container header, without decoding"""
+    cap = cv2.VideoCapture(str(clip_path))
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+
+
+def clip_seconds(clip_path: Path, fallback: float) -> float:
+    """Length of a rendered clip, fallback if its header can't be read"""
+    frames, fps = frame_count(clip_path)
+    return round(frames / fps, 3) if frames > 0 and fps > 0 else fallback
+
+
+def check_frame_count(clip_path: Path, duration: float, fps: Optional[float]) -> None:
+    """Raise unless the clip holds duration's worth of frames, give or take one at each edge"""
+    if not fps:
+        raise RuntimeError("unknown source frame rate")
+    frames, _ = frame_count(clip_path)
+    expected = duration * fps
+    if abs(frames - expected) > 1:
+        raise RuntimeError(f"{frames} frames where {expected:.0f} were expected")
+
+
+def cut_segment(video_path: str, start: float, end: float, clip_path: Path,
+                threads: int, probe: Dict[str, Any]) -> None:
+    """Stream copy between keyframes, re-encoding only the partial GOP at each edge
+
+    The video pieces are joined without audio, and the audio is encoded once
+    across the whole clip, so nothing drifts at the splices.
+    """
+    keyed = [(k, n) for k, n in zip(probe.get("keyframes", []), probe.get("keyframe_frames", []))
+             if start - KEYFRAME_TOLERANCE <= k <= end + KEYFRAME_TOLERANCE]
+    if not keyed:
+        encode_segment(video_path, start, end - start, clip_path, threads)
+        return
+
+    (first, first_frame), (last, last_frame) = keyed[0], keyed[-1]
+    starts_on_key = abs(first - start) <= KEYFRAME_TOLERANCE
+    ends_on_key = abs(last - end) <= KEYFRAME_TOLERANCE
+
+    if not (starts_on_key and ends_on_key) and probe.get("video_codec") not in SMART_CUT_VIDEO_CODECS:
+        encode_segment(video_path, start, end - start, clip_path, threads)
+        return
+
+    # (start, end, copy?) video pieces that join back into [start, end)
+    pieces = []
+    if not starts_on_key:
+        pieces.append((start, first, False))
+    if last_frame > first_frame:
+        pieces.append((first, last, True))
+    if not ends_on_key:
+        pieces.append((last, end, False))
+
+    parts = []
+    audio = clip_path.with_name(f"{clip_path.stem}_audio.m4a")
+    concat_list = clip_path.with_name(f"{clip_path.stem}_parts.txt")
+    try:
+        for n, (piece_start, piece_end, copy) in enumerate(pieces):
+            part = clip_path.with_name(f"{clip_path.stem}_part{n}.mp4")
+            parts.append(part)
+            if copy:
+                copy_segment(video_path, piece_start, last_frame - first_frame, part)
+            else:
+                encode_segment(video_path, piece_start, piece_end - piece_start, part,
+                               threads, pix_fmt=probe.get("pix_fmt"), audio=False)
+
+        concat_list.write_text("".join(f"file '{part.resolve()}'\n" for part in parts))
+        args = ["-f", "concat", "-safe", "0", "-i", str(concat_list)]
+        if probe.get("audio_codec"):
+            encode_audio(video_path, start, end - start, audio)
+            args += ["-i", str(audio), "-map", "0:v", "-map", "1:a"]
+        run_ffmpeg(args + ["-c", "copy", "-movflags", "+faststart", str(clip_path)])
+        check_frame_count(clip_path, end - start, probe.get("fps"))
+    except Exception as e:
+        logger.warning(f"Smart cut failed for {clip_path.name}, re-encoding: {str(e)}")
+        encode_segment(video_path, start, end - start, clip_path, threads)
+    finally:
+        for path in parts + [audio, concat_list]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,148 @@
+"""
+Manifest Engine v1.3 - Scene Detection
+Score scene cuts on small luma thumbnails, a batch of frames at a time.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+
+from frame_source import FrameConsumer, VideoMetadata
+
+logger = logging.getLogger(__name__)
+
+SCENE_METRICS = ("diff", "histogram", "combined")
+
+DEFAULT_THRESHOLD = 30.0       # mean absolute luma difference, 0-255
+DEFAULT_HIST_THRESHOLD = 0.4   # histogram distance, 0-1
+HIST_BINS = 32
+
+
+def to_luma_thumbnail(frame: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Downscale first so the colour conversion only touches a few thousand pixels"""
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def frame_differences(thumbs: np.ndarray) -> np.ndarray:
+    """Mean absolute difference between each consecutive pair of thumbnails"""
+    stack = thumbs.astype(np.int16)
+    return np.abs(stack[1:] - stack[:-1]).mean(axis=(1, 2))
+
+
+def luma_histograms(thumbs: np.ndarray, bins: int = HIST_BINS) -> np.ndarray:
+    """Normalized luma histogram of every thumbnail, computed in a single bincount"""
+    n = thumbs.shape[0]
+    shift = int(np.log2(256 // bins))
+    binned = (thumbs.reshape(n, -1) >> shift).astype(np.int64)
+    binned += (np.arange(n, dtype=np.int64) * bins)[:, None]
+    counts = np.bincount(binned.ravel(), minlength=n * bins).reshape(n, bins)
+    return counts / float(thumbs[0].size)
+
+
+def histogram_distances(thumbs: np.ndarray, bins: int = HIST_BINS) -> np.ndarray:
+    """Half L1 distance between consecutive histograms, 0 (identical) to 1 (disjoint)"""
+    hists = luma_histograms(thumbs, bins)
+    return 0.5 * np.abs(hists[1:] - hists[:-1]).sum(axis=1)
+
+
+class SceneDetector(FrameConsumer):
+    """Scene detection based on downscaled frame differences and luma histograms"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, metric: str = "diff",
+                 hist_threshold: float = DEFAULT_HIST_THRESHOLD,
+                 thumb_width: int = 64, batch_size: int = 64):
+        if metric not in SCENE_METRICS:
+            raise ValueError(f"Unknown scene metric: {metric}")
+        self.threshold = threshold
+        self.metric = metric
+        self.hist_threshold = hist_threshold
+        self.thumb_width = thumb_width
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "SceneDetector":
+        """Build a detector from the sceneThreshold / sceneMetric / sceneHistThreshold settings"""
+        return cls(
+            threshold=float(settings.get("sceneThreshold", DEFAULT_THRESHOLD)),
+            metric=settings.get("sceneMetric", "diff"),
+            hist_threshold=float(settings.get("sceneHistThreshold", DEFAULT_HIST_THRESHOLD)),
+        )
+
+    def start(self, metadata: VideoMetadata) -> None:
+        self.fps = metadata.fps
+        self.frame_count = metadata.frame_count
+        self.scenes = []
+        self.scene_start = 0
+
+        width = self.thumb_width
+        if metadata.width > 0 and metadata.height > 0:
+            height = max(1, round(width * metadata.height / metadata.width))
+        else:
+            height = max(1, width * 9 // 16)
+        self._thumb_size = (width, height)
+        self._batch = np.empty((self.batch_size, height, width), dtype=np.uint8)
+        self._indices: List[int] = []
+        self._prev_thumb = None
+
+    def feed(self, index: int, frame: np.ndarray) -> None:
+        self._batch[len(self._indices)] = to_luma_thumbnail(frame, *self._thumb_size)
+        self._indices.append(index)
+        if len(self._indices) == self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        count = len(self._indices)
+        if count == 0:
+            return
+
+        thumbs = self._batch[:count]
+        if self._prev_thumb is not None:
+            # Carry the last thumbnail over so cuts on batch boundaries are not missed
+            sequence = np.concatenate([self._prev_thumb[None], thumbs])
+            cut_indices = self._indices
+        else:
+            sequence = thumbs
+            cut_indices = self._indices[1:]
+
+        if len(sequence) > 1:
+            for index in np.asarray(cut_indices)[self._score(sequence)]:
+                self._cut(int(index))
+
+        self._prev_thumb = thumbs[-1].copy()
+        self._indices = []
+
+    def _score(self, sequence: np.ndarray) -> np.ndarray:
+        """Boolean mask of consecutive pairs that count as a scene change"""
+        if self.metric == "diff":
+            return frame_differences(sequence) > self.threshold
+        if self.metric == "histogram":
+            return histogram_distances(sequence) > self.hist_threshold
+        # combined: pixels and tonal distribution must both change, which ignores fast motion
+        return ((frame_differences(sequence) > self.threshold) &
+                (histogram_distances(sequence) > self.hist_threshold))
+
+    def _cut(self, index: int) -> None:
+        fps = self.fps
+        self.scenes.append({
+            "start": self.scene_start / fps if fps > 0 else 0,
+            "end": index / fps if fps > 0 else 0,
+            "duration": (index - self.scene_start) / fps if fps > 0 else 0
+        })
+        self.scene_start = index
+
+    def finish(self) -> List[Dict[str, Any]]:
+        self._flush()
+
+        # Add final scene
+        if self.scene_start < self.frame_count and self.fps > 0:
+            self.scenes.append({
+                "start": self.scene_start / self.fps,
+                "end": self.frame_count / self.fps,
+                "duration": (self.frame_count - self.scene_start) / self.fps
+            })
+        return self.scenes
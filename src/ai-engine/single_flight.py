@@ -0,0 +1,208 @@
+"""
+Manifest Engine v1.3 - Request Coalescing
+Concurrent requests for the same result share one computation, in this process and across workers.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# A worker's lock lapses this long after it stops renewing it, e.g. because it died
+LOCK_TTL = int(os.environ.get("MANIFEST_SINGLE_FLIGHT_LOCK_TTL", 30))
+# How long to wait on another worker's run before doing the work here anyway
+WAIT_SECONDS = float(os.environ.get("MANIFEST_SINGLE_FLIGHT_WAIT_SECONDS", 1800))
+
+# Delete or extend the lock only while it still holds our token
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("del", KEYS[1]) else return 0 end
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("expire", KEYS[1], ARGV[2]) else return 0 end
+"""
+
+Progress = Callable[[str, str], None]
+
+
+class Flight:
+    """One running computation and the progress callbacks of everyone waiting on it"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Tuple[str, str]] = []
+        self.listeners: Dict[asyncio.Future, Tuple[Progress, bool]] = {}
+
+    def attach(self, progress: Optional[Progress], aborted: asyncio.Future, leader: bool) -> None:
+        """Replay the events so far to a waiter, then send it every later one"""
+        if progress is None:
+            return
+        if not leader:
+            for stage, state in list(self.events):
+                if not self._deliver(progress, aborted, stage, state):
+                    return
+        self.listeners[aborted] = (progress, leader)
+
+    def detach(self, aborted: asyncio.Future) -> None:
+        self.listeners.pop(aborted, None)
+
+    def notify(self, stage: str, state: str) -> None:
+        """Fan a stage event out. The leader's callback raises into the run, a waiter's only ends its own wait"""
+        if not self.events or self.events[-1] != (stage, state):
+            self.events.append((stage, state))
+        for aborted, (progress, leader) in list(self.listeners.items()):
+            if leader:
+                progress(stage, state)
+            else:
+                self._deliver(progress, aborted, stage, state)
+
+    def _deliver(self, progress: Progress, aborted: asyncio.Future, stage: str, state: str) -> bool:
+        try:
+            progress(stage, state)
+            return True
+        except Exception as e:
+            self.detach(aborted)
+            if not aborted.done():
+                aborted.set_exception(e)
+            return False
+
+
+class SingleFlight:
+    """Run compute once per key, however many callers ask for it at the same time
+
+    Callers in this process attach to the running task. With a Redis client,
+    the process that takes the key's lock computes and the others poll lookup
+    (the shared result cache) until the result lands or the lock goes away.
+    Redis errors fall back to computing locally.
+    """
+
+    def __init__(self, redis_client: Any = None, prefix: str = "single_flight",
+                 lock_ttl: int = LOCK_TTL, wait_seconds: float = WAIT_SECONDS, poll_interval: float = 0.5):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self._running: Dict[str, asyncio.Task] = {}
+        self.stats = {"runs": 0, "local_waits": 0, "remote_waits": 0}
+
+    async def run(self, key: str, compute: Callable[[Progress], Awaitable[Any]],
+                  lookup: Optional[Callable[[], Awaitable[Any]]] = None,
+                  retry_on: Tuple[Type[BaseException], ...] = (),
+                  progress: Optional[Progress] = None) -> Tuple[Any, bool]:
+        """Returns (result, shared), shared meaning another caller's run produced it
+
+        compute is called with a progress function. Every (stage, state) it
+        reports reaches the progress of each caller attached to the run, and
+        callers that attach late get the earlier events first. An exception
+        from a waiting caller's progress, e.g. its job being cancelled, ends
+        that caller's wait with it and leaves the run going.
+
+        A caller attached to a run that failed with one of retry_on, e.g. the
+        first caller's job being cancelled, starts over instead of failing.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            flight = self._running.get(key)
+            leader = flight is None
+            if leader:
+                flight = Flight()
+                flight.task = asyncio.ensure_future(self._lead(key, compute, lookup, flight))
+                self._running[key] = flight
+                flight.task.add_done_callback(lambda done, flight=flight: self._forget(key, flight))
+            else:
+                self.stats["local_waits"] += 1
+
+            aborted = loop.create_future()
+            flight.attach(progress, aborted, leader)
+            try:
+                # Waiting, not awaiting: a caller going away doesn't cancel the run the others wait on
+                await asyncio.wait({flight.task, aborted}, return_when=asyncio.FIRST_COMPLETED)
+                if aborted.done():
+                    raise aborted.exception()
+                if leader:
+                    return flight.task.result()
+                try:
+                    result, _ = flight.task.result()
+                except retry_on:
+                    continue
+                return result, True
+            finally:
+                flight.detach(aborted)
+
+    def _forget(self, key: str, flight: Flight) -> None:
+        if self._running.get(key) is flight:
+            del self._running[key]
+
+    async def _lead(self, key: str, compute: Callable[[Progress], Awaitable[Any]],
+                    lookup: Optional[Callable[[], Awaitable[Any]]], flight: Flight) -> Tuple[Any, bool]:
+        """This process's run: take the cross-worker lock, or wait for whoever holds it"""
+        if self.redis is None or lookup is None:
+            self.stats["runs"] += 1
+            return await compute(flight.notify), False
+
+        lock_key = f"{self.prefix}:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        while not await self._acquire(lock_key, token):
+            if not waited:
+                logger.info(f"Another worker is computing {key}, waiting for its result")
+                self.stats["remote_waits"] += 1
+                waited = True
+            # The other worker's stages can't be seen from here, so waiters see this one,
+            # and a waiter's cancellation is checked on every poll
+            flight.notify("coalesced", "running")
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting on another worker for {key}")
+                break
+            await asyncio.sleep(self.poll_interval)
+            result = await lookup()
+            if result is not None:
+                flight.notify("coalesced", "completed")
+                return result, True
+        else:
+            # The holder may have finished between our lookup and taking the lock
+            if waited:
+                result = await lookup()
+                if result is not None:
+                    await self._release(lock_key, token)
+                    flight.notify("coalesced", "completed")
+                    return result, True
+
+        renew = asyncio.ensure_future(self._renew(lock_key, token))
+        try:
+            self.stats["runs"] += 1
+            return await compute(flight.notify), False
+        finally:
+            renew.cancel()
+            await self._release(lock_key, token)
+
+    async def _acquire(self, lock_key: str, token: str) -> bool:
+        """True if the lock is ours, or Redis can't be reached and every worker is on its own"""
+        try:
+            return bool(await asyncio.to_thread(self.redis.set, lock_key, token, nx=True, ex=self.lock_ttl))
+        except Exception as e:
+            logger.debug(f"Single-flight lock unavailable, computing locally: {str(e)}")
+            return True
+
+    async def _renew(self, lock_key: str, token: str) -> None:
+        """Keep the lock alive for as long as the computation runs"""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                await asyncio.to_thread(self.redis.eval, RENEW_SCRIPT, 1, lock_key, token, self.lock_ttl)
+            except Exception as e:
+                logger.debug(f"Single-flight lock renewal failed: {str(e)}")
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        try:
+            await asyncio.to_thread(self.redis.eval, RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.debug(f"Single-flight lock release failed: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.stats, in_flight=len(self._running), redis=self.redis is not None)
@@ -0,0 +1,39 @@
+"""
+Manifest Engine v1.3 - SQLite Connections
+One connection per process for the SQLite stores, reopened after a fork.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+
+class ForkSafeConnection:
+    """A lazily opened SQLite connection and the lock every use of it holds
+
+    Nothing is opened until first use, and a forked child (gunicorn --preload,
+    Celery prefork) opens its own instead of sharing the parent's handle.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection]):
+        self.connect = connect
+        self.lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._inherited: List[Optional[sqlite3.Connection]] = []
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # Runs in the child right after a fork, before any other thread
+        self.lock = threading.Lock()
+        # Kept referenced, never closed: closing it here would run SQLite's close path on the parent's handle
+        self._inherited.append(self._connection)
+        self._connection = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This process's connection, only used while holding lock"""
+        if self._connection is None:
+            self._connection = self.connect()
+        return self._connection
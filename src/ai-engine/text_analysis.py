@@ -0,0 +1,182 @@
+"""
+Manifest Engine v1.3 - Text Analysis
+Score the whole transcript for sentiment in token-bounded windows and shared micro-batches.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import INFERENCE_SECONDS, INFERENCE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_BATCH_SIZE = int(os.environ.get("MANIFEST_SENTIMENT_BATCH_SIZE", 32))
+SENTIMENT_MAX_WAIT_MS = float(os.environ.get("MANIFEST_SENTIMENT_MAX_WAIT_MS", 20))
+
+# distilbert-style models take 512 tokens including [CLS] and [SEP]
+DEFAULT_MAX_TOKENS = 510
+
+# A fast tokenizer raises "Already borrowed" when two threads use it at once, so the
+# batcher's pipeline calls and token counting on worker threads take turns on this
+TOKENIZER_LOCK = threading.Lock()
+
+
+def token_counter(pipe: Any) -> Callable[[List[str]], List[int]]:
+    """Count tokens with the pipeline's own tokenizer in one batched call, or estimate from words"""
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is None:
+        return lambda texts: [len(text.split()) * 4 // 3 + 1 for text in texts]
+
+    def count(texts: List[str]) -> List[int]:
+        with TOKENIZER_LOCK:
+            encoded = tokenizer(texts, add_special_tokens=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    return count
+
+
+def max_window_tokens(pipe: Any) -> int:
+    tokenizer = getattr(pipe, "tokenizer", None)
+    limit = getattr(tokenizer, "model_max_length", None) or DEFAULT_MAX_TOKENS + 2
+    return min(limit, DEFAULT_MAX_TOKENS + 2) - 2
+
+
+def build_windows(segments: List[Dict[str, Any]], count_tokens: Callable[[List[str]], List[int]],
+                  max_tokens: int = DEFAULT_MAX_TOKENS) -> List[Dict[str, Any]]:
+    """Group consecutive transcript segments into windows of at most max_tokens
+
+    Segments longer than a window on their own are split by words, with
+    their timestamps interpolated across the pieces.
+    """
+    segments = [segment for segment in segments if segment.get("text", "").strip()]
+    if not segments:
+        return []
+
+    windows = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            windows.append({
+                "start": current[0].get("start"),
+                "end": current[-1].get("end"),
+                "text": " ".join(segment["text"].strip() for segment in current)
+            })
+        current, current_tokens = [], 0
+
+    for segment, tokens in zip(segments, count_tokens([segment["text"] for segment in segments])):
+        if tokens > max_tokens:
+            flush()
+            windows.extend(split_segment(segment, tokens, max_tokens))
+            continue
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(segment)
+        current_tokens += tokens
+    flush()
+
+    return windows
+
+
+def split_segment(segment: Dict[str, Any], tokens: int, max_tokens: int) -> List[Dict[str, Any]]:
+    words = segment["text"].split()
+    # Leave headroom, the estimate assumes tokens are spread evenly over words
+    per_window = max(1, int(len(words) * max_tokens * 0.9 / tokens))
+    start, end = segment.get("start"), segment.get("end")
+
+    pieces = []
+    for first in range(0, len(words), per_window):
+        last = min(len(words), first + per_window)
+        piece = {"text": " ".join(words[first:last]), "start": None, "end": None}
+        if start is not None and end is not None:
+            piece["start"] = round(start + (end - start) * first / len(words), 3)
+            piece["end"] = round(start + (end - start) * last / len(words), 3)
+        pieces.append(piece)
+    return pieces
+
+
+def positive_probability(result: Dict[str, Any]) -> float:
+    return result["score"] if result["label"] == "POSITIVE" else 1.0 - result["score"]
+
+
+def overall_positivity(scored: List[Dict[str, Any]]) -> float:
+    """Mean probability of positive sentiment, weighted by each window's length"""
+    weights = [max(1, len(window["text"])) for window in scored]
+    total = sum(weights)
+    return sum(w * window["positive"] for w, window in zip(weights, scored)) / total if total else 0.0
+
+
+class SentimentBatcher:
+    """Coalesce sentiment requests from concurrent jobs into shared pipeline batches
+
+    Requests are queued for up to max_wait_ms or until batch_size texts are
+    waiting, then scored together on one background thread.
+    """
+
+    def __init__(self, load_model: Callable[[], Any], batch_size: int = SENTIMENT_BATCH_SIZE,
+                 max_wait_ms: float = SENTIMENT_MAX_WAIT_MS):
+        self.load_model = load_model
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+
+    def submit(self, texts: List[str]) -> Future:
+        """Future resolving to one pipeline result per text"""
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                self._thread.start()
+        self._queue.put((texts, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            requests = [self._queue.get()]
+            waiting = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while waiting < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                waiting += len(request[0])
+
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                pipe = self.load_model()
+                if pipe is None:
+                    raise RuntimeError("Sentiment model not available")
+                with TOKENIZER_LOCK, INFERENCE_SECONDS.time(model="sentiment"):
+                    outputs = pipe(texts, batch_size=self.batch_size, truncation=True)
+                INFERENCE_BATCH_SIZE.observe(len(texts), model="sentiment")
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            position = 0
+            for request_texts, future in requests:
+                future.set_result(outputs[position:position + len(request_texts)])
+                position += len(request_texts)
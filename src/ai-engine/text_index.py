@@ -0,0 +1,88 @@
+"""
+Manifest Engine v1.3 - Text Index
+Term frequencies of a transcript, built once and extended as transcript chunks arrive.
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\b[a-z]+\b")
+MIN_KEYWORD_LENGTH = int(os.environ.get("MANIFEST_MIN_KEYWORD_LENGTH", 4))
+# Extra stop words, one per line, for domain filler the defaults miss
+STOP_WORDS_FILE = os.environ.get("MANIFEST_STOP_WORDS_FILE")
+
+DEFAULT_STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are aren as at be because been before
+being below between both but by can cannot could couldn did didn do does doesn doing don down
+during each even ever every few for from further get gets getting go goes going gonna gotta got
+had hadn has hasn have haven having he her here hers herself him himself his how however i if in
+into is isn it its itself just know let like look lot lots make many maybe me might more most
+much must my myself no nor not now of off okay on once one only or other ought our ours
+ourselves out over own pretty probably put quite rather really right said same say says see she
+should shouldn so some something still such sure take than that thats the their theirs them
+themselves then there these they thing things think this those though through thus to too
+toward under until up upon us very want wanna was wasn way we well were weren what whatever when
+where whether which while who whom whose why will with within without won would wouldn yeah yes
+yet you your yours yourself yourselves actually basically literally kind sort stuff
+""".split())
+
+
+def load_stop_words(path: Optional[str] = STOP_WORDS_FILE) -> frozenset:
+    """The default stop words plus any listed in path"""
+    if not path:
+        return DEFAULT_STOP_WORDS
+    try:
+        extra = Path(path).read_text().split()
+    except OSError as e:
+        logger.warning(f"Could not read stop words from {path}: {str(e)}")
+        return DEFAULT_STOP_WORDS
+    return DEFAULT_STOP_WORDS | {word.lower() for word in extra}
+
+
+STOP_WORDS = load_stop_words()
+
+
+def tokenize(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+class TextIndex:
+    """Keyword counts over everything added so far, safe to read while another thread adds"""
+
+    def __init__(self, stop_words: Iterable[str] = STOP_WORDS, min_length: int = MIN_KEYWORD_LENGTH):
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+        self.counts: Counter = Counter()
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_text(cls, text: str, **kwargs) -> "TextIndex":
+        index = cls(**kwargs)
+        index.add(text)
+        return index
+
+    def add(self, text: str) -> None:
+        """Count another chunk of transcript"""
+        words = tokenize(text or "")
+        terms = [w for w in words if len(w) >= self.min_length and w not in self.stop_words]
+        with self._lock:
+            self.tokens += len(words)
+            self.counts.update(terms)
+
+    def keywords(self, count: int = 10) -> List[str]:
+        with self._lock:
+            return [word for word, _ in self.counts.most_common(count)]
+
+    def hashtags(self, count: int = 5) -> List[str]:
+        return [f"#{word}" for word in self.keywords(count)]
+
+    def __len__(self) -> int:
+        return self.tokens
@@ -0,0 +1,149 @@
+"""
+Manifest Engine v1.3 - Thumbnails
+Pick the best of a few source frames per clip with one seek, and write it at clip resolution plus a preview.
+"""
+
+import os
+import bisect
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CANDIDATES = int(os.environ.get("MANIFEST_THUMBNAIL_CANDIDATES", 5))
+# Width of the WebP preview written next to each JPEG, 0 turns previews off
+PREVIEW_WIDTH = int(os.environ.get("MANIFEST_THUMBNAIL_PREVIEW_WIDTH", 320))
+WEBP_AVAILABLE = cv2.haveImageWriter(".webp")
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+CANDIDATE_SPAN = 3.0    # seconds of video around the 1/3 point the candidates are spread over
+SCORE_WIDTH = 160       # frames are scored on a copy this wide
+VERTICAL_HEIGHT = 1920  # vertical clips are rendered 1080x1920
+
+
+def candidate_times(start: float, end: float, count: int = THUMBNAIL_CANDIDATES) -> List[float]:
+    """Times spread over a short span around 1/3 into the clip, where the old thumbnail came from"""
+    duration = max(0.0, end - start)
+    centre = start + duration / 3
+    half = min(CANDIDATE_SPAN, duration * 0.5) / 2
+    return np.linspace(max(start, centre - half), min(end, centre + half), max(1, count)).tolist()
+
+
+def score_frame(frame: np.ndarray) -> float:
+    """Sharpness (Laplacian variance) weighted by how well exposed the frame is"""
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (SCORE_WIDTH, max(1, height * SCORE_WIDTH // max(1, width))),
+                       interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    sharpness = cv2.Laplacian(gray, cv2.CV_32F).var()
+    brightness = float(gray.mean())
+    exposure = 1.0 - abs(brightness - 128.0) / 128.0
+    return float(np.log1p(sharpness) * (0.25 + 0.75 * exposure))
+
+
+def vertical_crop(frame: np.ndarray) -> np.ndarray:
+    """Centre 9:16 crop, the region a vertical clip keeps"""
+    height, width = frame.shape[:2]
+    crop = min(width, height * 9 // 16)
+    left = (width - crop) // 2
+    return frame[:, left:left + crop]
+
+
+def clip_frame(frame: np.ndarray, vertical: bool = False, height: Optional[int] = None) -> np.ndarray:
+    """The frame cropped and resized like the clip, landscape frames are only ever scaled down"""
+    if vertical:
+        frame = vertical_crop(frame)
+        height = height or VERTICAL_HEIGHT
+    source_height, source_width = frame.shape[:2]
+    if not height or source_height == height or (not vertical and source_height < height):
+        return frame
+    width = max(2, round(source_width * height / source_height) // 2 * 2)
+    interpolation = cv2.INTER_AREA if height < source_height else cv2.INTER_CUBIC
+    return cv2.resize(frame, (width, height), interpolation=interpolation)
+
+
+def best_frame(cap: Any, start: float, end: float, keyframes: Sequence[float] = (),
+               count: int = THUMBNAIL_CANDIDATES) -> Optional[np.ndarray]:
+    """Seek once, to the keyframe before the first candidate, then decode forward through the rest"""
+    times = candidate_times(start, end, count)
+    # Landing on a keyframe means the seek itself decodes nothing it throws away
+    position = bisect.bisect_right(list(keyframes), times[0]) - 1
+    seek_to = keyframes[position] if position >= 0 else times[0]
+    cap.set(cv2.CAP_PROP_POS_MSEC, seek_to * 1000)
+
+    best, best_score = None, -1.0
+    pending = 0
+    while pending < len(times):
+        if not cap.grab():
+            break
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp + 1e-3 < times[pending]:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        score = score_frame(frame)
+        if score > best_score:
+            best, best_score = frame, score
+        while pending < len(times) and times[pending] <= timestamp + 1e-3:
+            pending += 1
+    return best
+
+
+def thumbnail_variants(frame: np.ndarray, base_path: Path) -> List[Tuple[Path, bytes]]:
+    """The JPEG at clip resolution and, when enabled, a small WebP preview"""
+    variants = []
+    ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if ok:
+        variants.append((base_path.with_suffix(".jpg"), data.tobytes()))
+
+    height, width = frame.shape[:2]
+    if PREVIEW_WIDTH > 0 and WEBP_AVAILABLE and width > 0:
+        preview_width = min(PREVIEW_WIDTH, width)
+        preview = cv2.resize(frame, (preview_width, max(1, height * preview_width // width)),
+                             interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".webp", preview, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+        if ok:
+            variants.append((base_path.with_suffix(".webp"), data.tobytes()))
+    return variants
+
+
+def extract_thumbnails(video_path: str, windows: List[Tuple[float, float]], base_paths: List[str],
+                       vertical: bool = False, keyframes: Sequence[float] = (),
+                       height: Optional[int] = None) -> List[Dict[str, Optional[str]]]:
+    """Thumbnails for every clip of a job straight from the source, at the clips' output size. Blocking.
+
+    height is the clips' output height (1920 for vertical clips by default,
+    the source's for landscape). Each frame is written as soon as it is picked,
+    so only one full-size frame is held at a time.
+
+    Returns {"thumbnail", "preview"} file names per window, None where no frame could be read.
+    """
+    results: List[Dict[str, Optional[str]]] = [{"thumbnail": None, "preview": None} for _ in windows]
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            logger.error(f"Error generating thumbnails: could not open {video_path}")
+            return results
+        # In source order, so successive seeks only move forward
+        for i in sorted(range(len(windows)), key=lambda i: windows[i][0]):
+            frame = best_frame(cap, windows[i][0], windows[i][1], keyframes)
+            if frame is None:
+                logger.error(f"Error generating thumbnail: no frame at {windows[i][0]:.2f}s")
+                continue
+            for path, data in thumbnail_variants(clip_frame(frame, vertical, height), Path(base_paths[i])):
+                try:
+                    path.write_bytes(data)
+                except OSError as e:
+                    logger.error(f"Error writing thumbnail {path}: {str(e)}")
+                    continue
+                results[i]["thumbnail" if path.suffix == ".jpg" else "preview"] = path.name
+    finally:
+        cap.release()
+    return results
@@ -0,0 +1,193 @@
+"""
+Manifest Engine v1.3 - Chunked Transcription
+Stream audio out of ffmpeg, split it at silences and transcribe chunks in parallel.
+"""
+
+import os
+import logging
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from render import FFMPEG_BIN, FFMPEG_AVAILABLE
+
+try:
+    import whisper
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+    whisper = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # what Whisper expects
+TRANSCRIBE_PROCESSES = int(os.environ.get("MANIFEST_TRANSCRIBE_PROCESSES", max(1, (os.cpu_count() or 2) // 2)))
+CHUNK_SECONDS = float(os.environ.get("MANIFEST_TRANSCRIBE_CHUNK_SECONDS", 30))
+# Media at least this long is transcribed in chunks when transcribeMode is "auto"
+CHUNKED_MIN_SECONDS = float(os.environ.get("MANIFEST_CHUNKED_MIN_SECONDS", 600))
+
+TRANSCRIBE_MODES = ("auto", "whole", "chunked")
+
+SILENCE_RMS = 0.02     # roughly -34 dBFS
+VAD_FRAME_MS = 30
+
+
+def stream_audio(video_path: Path, sample_rate: int = SAMPLE_RATE,
+                 block_seconds: float = 10.0) -> Iterator[np.ndarray]:
+    """Decode the audio track to mono float32 blocks without holding the whole track"""
+    if not FFMPEG_AVAILABLE:
+        raise RuntimeError("ffmpeg not available")
+
+    process = subprocess.Popen(
+        [FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error", "-i", str(video_path),
+         "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    block_bytes = int(sample_rate * block_seconds) * 2
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            data = data[:len(data) - len(data) % 2]
+            yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def quietest_frame(audio: np.ndarray, start: int, end: int, sample_rate: int) -> Tuple[int, float]:
+    """Sample offset of the centre of the lowest-energy VAD frame in audio[start:end], and its RMS"""
+    frame = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    count = (end - start) // frame
+    if count <= 0:
+        return end, 1.0
+    frames = audio[start:start + count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    index = int(np.argmin(rms))
+    return start + index * frame + frame // 2, float(rms[index])
+
+
+def split_on_silence(blocks: Iterator[np.ndarray], sample_rate: int = SAMPLE_RATE,
+                     chunk_seconds: float = CHUNK_SECONDS) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield (offset_seconds, audio) chunks of about chunk_seconds, cut at pauses in speech
+
+    A chunk is cut at the quietest point in its second half once that point
+    is silent, and forced at the quietest point past the target once it
+    reaches 1.5x the target.
+    """
+    target = int(chunk_seconds * sample_rate)
+    limit = int(target * 1.5)
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= target:
+            cut, rms = quietest_frame(buffer, target // 2, min(len(buffer), limit), sample_rate)
+            if rms > SILENCE_RMS:
+                if len(buffer) < limit:
+                    break  # still talking, wait for more audio
+                cut, _ = quietest_frame(buffer, target, limit, sample_rate)
+            yield offset / sample_rate, buffer[:cut]
+            offset += cut
+            buffer = buffer[cut:]
+
+    if len(buffer):
+        yield offset / sample_rate, buffer
+
+
+def merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join per-chunk results, already shifted onto the source timeline, in order"""
+    text = " ".join(chunk["text"].strip() for chunk in chunks if chunk["text"].strip())
+    segments = [segment for chunk in chunks for segment in chunk["segments"]]
+    return {"text": text, "segments": segments}
+
+
+def trim_segments(segments: List[Dict[str, Any]], offset: float = 0.0) -> List[Dict[str, Any]]:
+    """Keep the fields clip selection needs and move them onto the source timeline"""
+    return [
+        {
+            "start": round(segment["start"] + offset, 3),
+            "end": round(segment["end"] + offset, 3),
+            "text": segment["text"].strip()
+        }
+        for segment in segments
+    ]
+
+
+# Each transcription worker process loads its own copy of the model once
+_worker_model = None
+
+
+def _init_worker(model_name: str, device: str, threads: int) -> None:
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = whisper.load_model(model_name, device=device)
+
+
+def _transcribe_chunk(offset: float, audio: np.ndarray) -> Dict[str, Any]:
+    result = _worker_model.transcribe(audio)
+    return {"text": result["text"], "segments": trim_segments(result.get("segments", []), offset)}
+
+
+class ChunkedTranscriber:
+    """Transcribe long media in bounded memory across several worker processes"""
+
+    def __init__(self, model_name: str = "base", device: str = "cpu",
+                 processes: int = TRANSCRIBE_PROCESSES, chunk_seconds: float = CHUNK_SECONDS):
+        self.model_name = model_name
+        self.device = device
+        self.processes = max(1, processes)
+        self.chunk_seconds = chunk_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self.processes)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.device, threads)
+            )
+        return self._executor
+
+    def transcribe(self, video_path: Path,
+                   on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Blocking, run it on a worker thread. on_chunk gets each chunk's result, in order, as it lands."""
+        pool = self._pool()
+        # Only a couple of chunks per worker are decoded ahead of the transcribers
+        max_in_flight = self.processes * 2
+        pending = deque()
+        chunks = []
+
+        def collect(chunk: Dict[str, Any]) -> None:
+            chunks.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+
+        for offset, audio in split_on_silence(stream_audio(video_path), chunk_seconds=self.chunk_seconds):
+            pending.append(pool.submit(_transcribe_chunk, offset, audio))
+            while len(pending) >= max_in_flight:
+                collect(pending.popleft().result())
+        while pending:
+            collect(pending.popleft().result())
+
+        logger.info(f"Transcribed {len(chunks)} chunks of {video_path}")
+        return merge_chunks(chunks)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
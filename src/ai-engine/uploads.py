@@ -0,0 +1,176 @@
+"""
+Manifest Engine v1.3 - Upload Handling
+Stream uploaded files straight from the request body to temporary disk files and always clean them up.
+"""
+
+import os
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, List, Optional
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:
+    import multipart
+    from multipart.multipart import parse_options_header
+
+from metrics import BYTES_READ
+
+logger = logging.getLogger(__name__)
+
+# Same 2GB ceiling the backend's multer upload enforces
+MAX_UPLOAD_MB = int(os.environ.get("MANIFEST_MAX_UPLOAD_MB", 2000))
+
+# Upload endpoints read the body themselves, this documents the form they expect
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"file": {"type": "string", "format": "binary"}},
+            "required": ["file"]
+        }}}
+    }
+}
+
+
+class UploadTooLarge(Exception):
+    """Raised once an upload goes past the size cap"""
+
+
+class UploadMissing(Exception):
+    """Raised when the request body is not multipart or carries no file field"""
+
+
+def check_content_length(headers: Any, max_bytes: int = MAX_UPLOAD_MB * 1024 * 1024) -> None:
+    """Reject an upload from its Content-Length before reading any of it"""
+    length = headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes / (1024 * 1024):g}MB limit")
+
+
+class UploadReceiver:
+    """Multipart parser callbacks that write one file field to a temporary file as it arrives
+
+    The file is created when the field's headers end, so it can keep the
+    client filename's extension. Other fields are ignored.
+    """
+
+    def __init__(self, field: str, directory: Optional[Path]):
+        self.field = field
+        self.directory = directory
+        self.path: Optional[Path] = None
+        self.filename: Optional[str] = None
+        self._out: Optional[BinaryIO] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._writing = False
+        self.pending: List[bytes] = []
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": lambda data, start, end: self._add_header(data[start:end], value=False),
+            "on_header_value": lambda data, start, end: self._add_header(data[start:end], value=True),
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end
+        }
+
+    def _part_begin(self) -> None:
+        self._disposition = b""
+
+    def _add_header(self, data: bytes, value: bool) -> None:
+        if value:
+            self._header_value += data
+        else:
+            self._header_field += data
+
+    def _header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("latin-1")
+        if name != self.field or self._out is not None:
+            return
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        # Only the extension is kept, client filenames are not trusted in paths
+        fd, path = tempfile.mkstemp(suffix=Path(self.filename).suffix, dir=self.directory)
+        self.path = Path(path)
+        self._out = os.fdopen(fd, "wb")
+        self._writing = True
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._writing:
+            self.pending.append(bytes(data[start:end]))
+
+    def _part_end(self) -> None:
+        self._writing = False
+
+    def flush(self) -> None:
+        """Write out what the last body chunk carried of the file. Blocking."""
+        if self.pending:
+            self._out.writelines(self.pending)
+            self.pending = []
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+
+
+async def receive_upload(request: Any, receiver: UploadReceiver, max_bytes: int) -> int:
+    """Feed the request body through the multipart parser, stopping as soon as the cap is passed"""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadMissing("Expected a multipart/form-data upload")
+
+    parser = multipart.MultipartParser(options[b"boundary"], receiver.callbacks())
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes / (1024 * 1024):g}MB limit")
+        try:
+            parser.write(chunk)
+        except ValueError as e:
+            # python-multipart's parse errors are ValueErrors
+            raise UploadMissing(f"Malformed multipart upload: {str(e)}")
+        await asyncio.to_thread(receiver.flush)
+    parser.finalize()
+    return received
+
+
+@asynccontextmanager
+async def saved_upload(request: Any, field: str = "file", max_bytes: int = MAX_UPLOAD_MB * 1024 * 1024,
+                       directory: Optional[Path] = None) -> AsyncIterator[Path]:
+    """Path of the request's file field written to a temporary file, deleted on exit even if analysis raises
+
+    Reads the raw request body, so the endpoint must not declare the file as
+    a form parameter: FastAPI would spool the whole body before the size cap
+    could be checked, and the temporary file would be a second copy.
+    """
+    check_content_length(request.headers, max_bytes)
+    receiver = UploadReceiver(field, directory)
+    try:
+        try:
+            received = await receive_upload(request, receiver, max_bytes)
+        finally:
+            receiver.close()
+        if receiver.path is None:
+            raise UploadMissing(f"No {field} field in upload")
+        BYTES_READ.inc(received, source="upload")
+        logger.debug(f"Saved upload {receiver.filename} ({received} bytes) to {receiver.path}")
+        yield receiver.path
+    finally:
+        if receiver.path is not None:
+            receiver.path.unlink(missing_ok=True)
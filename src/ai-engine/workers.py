@@ -0,0 +1,121 @@
+"""
+Manifest Engine v1.3 - Worker Pool
+Run blocking CPU stages off the asyncio event loop with bounded admission.
+"""
+
+import os
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+WORKER_THREADS = int(os.environ.get("MANIFEST_WORKER_THREADS", os.cpu_count() or 4))
+WORKER_QUEUE_DEPTH = int(os.environ.get("MANIFEST_WORKER_QUEUE_DEPTH", 16))
+RENDER_PROCESSES = int(os.environ.get("MANIFEST_RENDER_PROCESSES", max(1, (os.cpu_count() or 2) // 2)))
+ENCODER_THREADS = int(os.environ.get("MANIFEST_ENCODER_THREADS", 2))
+
+
+class WorkerPoolFull(Exception):
+    """Raised when a job arrives while every worker slot and queue slot is taken"""
+
+
+class WorkerPool:
+    """Thread pool for Whisper, OpenCV and MoviePy work
+
+    Threads are used rather than processes because the heavy lifting (decoding,
+    resizing, torch inference, ffmpeg encoding) releases the GIL, and the loaded
+    models stay shared instead of being pickled into every worker.
+
+    Clip encoding is the exception: MoviePy drives its frame pipeline from
+    Python, so renders go to a separate process pool created on first use.
+    ffmpeg renders only wait on a child process, so they get threads of their
+    own, as many as there are render processes, and never hold a worker slot
+    that CPU-bound stages are waiting for.
+    """
+
+    def __init__(self, max_workers: int = WORKER_THREADS, queue_depth: int = WORKER_QUEUE_DEPTH,
+                 render_processes: int = RENDER_PROCESSES, encoder_threads: int = ENCODER_THREADS):
+        self.max_workers = max(1, max_workers)
+        self.queue_depth = max(0, queue_depth)
+        self.render_processes = max(1, render_processes)
+        self.encoder_threads = max(1, encoder_threads)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="manifest-worker")
+        self._render_executor = None
+        self._encode_executor = None
+        self.in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+
+    @contextmanager
+    def reserve(self):
+        """Admit one job, refusing it once running plus queued jobs reach capacity"""
+        if self.in_flight >= self.capacity:
+            raise WorkerPoolFull(f"Worker pool is full ({self.in_flight}/{self.capacity} jobs)")
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, poll_interval: float = 0.2):
+        """Like reserve, but wait for a free slot instead of refusing the job"""
+        while self.in_flight >= self.capacity:
+            await asyncio.sleep(poll_interval)
+        with self.reserve():
+            yield
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def render(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a picklable module-level function on the render process pool"""
+        if self._render_executor is None:
+            # spawn, not fork: this process already runs threads that may hold locks
+            self._render_executor = ProcessPoolExecutor(
+                max_workers=self.render_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        executor = self._render_executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        except BrokenProcessPool:
+            # A worker died mid-render, start a fresh pool for the next request
+            if self._render_executor is executor:
+                self._render_executor = None
+            raise
+
+    async def encode(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a callable that drives ffmpeg child processes, off the worker threads"""
+        if self._encode_executor is None:
+            self._encode_executor = ThreadPoolExecutor(
+                max_workers=self.render_processes, thread_name_prefix="manifest-encode"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._encode_executor, functools.partial(func, *args, **kwargs))
+
+    def status(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "render_processes": self.render_processes,
+            "encoder_threads": self.encoder_threads
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for executor in (self._render_executor, self._encode_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
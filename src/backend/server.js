@@ -1063,6 +1063,7 @@ app.post('/api/upload', upload.single('file'), async (req, res) => {
 });
 
 // NEW FUNCTION: Process video with AI
+// Submits a job to the AI engine and polls it, so long renders never hold a connection open
 async function processVideoWithAI(videoId, filename) {
   try {
     io.emit('processing-update', { 
@@ -1070,7 +1071,7 @@ async function processVideoWithAI(videoId, filename) {
       status: 'Starting AI processing...' 
     });
     
-    const response = await fetch('http://localhost:8000/process', {
+    const response = await fetch('http://localhost:8000/jobs', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
@@ -1090,17 +1091,19 @@ async function processVideoWithAI(videoId, filename) {
       })
     });
     
-    if (response.ok) {
-      const result = await response.json();
-      io.emit('processing-complete', {
-        type: 'processing-complete',
-        videoId: videoId,
-        clips: result.clips || [],
-        viral_score: result.viral_score || 0
-      });
-    } else {
+    if (!response.ok) {
       throw new Error('AI processing failed');
     }
+    
+    const { jobId } = await response.json();
+    const result = await waitForAIJob(jobId);
+    
+    io.emit('processing-complete', {
+      type: 'processing-complete',
+      videoId: videoId,
+      clips: result.clips || [],
+      viral_score: result.viral_score || 0
+    });
   } catch (error) {
     console.error('AI processing error:', error);
     io.emit('processing-error', {
@@ -1110,6 +1113,59 @@ async function processVideoWithAI(videoId, filename) {
   }
 }
 
+// Give up on an AI job after this long, or after this many status polls fail in a row
+const AI_JOB_TIMEOUT_MS = Number(process.env.AI_JOB_TIMEOUT_MS) || 2 * 60 * 60 * 1000;
+const AI_JOB_MAX_POLL_ERRORS = Number(process.env.AI_JOB_MAX_POLL_ERRORS) || 5;
+
+// Poll an AI engine job until it finishes, forwarding stage changes to clients
+async function waitForAIJob(jobId, intervalMs = 2000) {
+  const deadline = Date.now() + AI_JOB_TIMEOUT_MS;
+  let lastStage = null;
+  let errors = 0;
+  
+  while (true) {
+    if (Date.now() > deadline) {
+      throw new Error(`AI job did not finish within ${Math.round(AI_JOB_TIMEOUT_MS / 1000)}s`);
+    }
+    
+    let job;
+    try {
+      const response = await fetch(`http://localhost:8000/jobs/${jobId}`);
+      if (!response.ok) {
+        throw new Error(`AI job status unavailable (HTTP ${response.status})`);
+      }
+      job = await response.json();
+      errors = 0;
+    } catch (error) {
+      // Jobs survive an engine restart, so ride out a few failed polls with growing waits
+      errors += 1;
+      if (errors >= AI_JOB_MAX_POLL_ERRORS) {
+        throw error;
+      }
+      console.warn(`AI job ${jobId} status poll failed (${errors}/${AI_JOB_MAX_POLL_ERRORS}): ${error.message}`);
+      await new Promise((resolve) => setTimeout(resolve, intervalMs * errors));
+      continue;
+    }
+    
+    if (job.status === 'completed') {
+      return job.result || {};
+    }
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      throw new Error(job.error || `AI job ${job.status}`);
+    }
+    
+    if (job.stage && job.stage !== lastStage) {
+      lastStage = job.stage;
+      io.emit('processing-update', {
+        type: 'processing-update',
+        status: `AI processing: ${job.stage.replace(/_/g, ' ')}...`
+      });
+    }
+    
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 // API Health Check
 app.get('/api/health', (req, res) => {
   res.json({